@@ -0,0 +1,79 @@
+# allocations per frame in a 200 meteor scene, measured with tracemalloc
+#   python bench/alloc.py
+
+import gc
+import tracemalloc
+
+from common import *
+
+class VectorCounter():
+    # counts Vector2 objects made while installed
+    def __init__(self):
+        self.count = 0
+        self.init = Vector2.__init__
+
+    def install(self):
+        counter = self
+        init = self.init
+        def counting_init(self, x, y):
+            counter.count += 1
+            init(self, x, y)
+        Vector2.__init__ = counting_init
+
+    def uninstall(self):
+        Vector2.__init__ = self.init
+
+def main(num_meteors = 200, frames = 120):
+    sim = make_scene(num_meteors)
+    # fire from the ship every so often, so bullets come and go
+    sim.ship.turn(TURN.left, True)
+    sim.ship.thrust(THRUST.forward, True)
+    for i in range(10):
+        sim.update(1.0 / 60)
+
+    collections = [0, 0, 0]
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections[info['generation']] += 1
+
+    counter = VectorCounter()
+    counter.install()
+    gc.callbacks.append(on_gc)
+    tracemalloc.start()
+    peaks = []
+    blocks = []
+    for i in range(frames):
+        if i % 20 == 0:
+            sim.bullet = None
+            sim.add_bullet()
+        snapshot1 = tracemalloc.take_snapshot()
+        (current, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        sim.update(1.0 / 60)
+        (after, peak) = tracemalloc.get_traced_memory()
+        snapshot2 = tracemalloc.take_snapshot()
+        peaks.append(peak - current)
+        stats = snapshot2.compare_to(snapshot1, 'filename')
+        blocks.append(sum([max(0, stat.count_diff) for stat in stats]))
+    tracemalloc.stop()
+    gc.callbacks.remove(on_gc)
+    counter.uninstall()
+
+    peaks.sort()
+    blocks.sort()
+    print('%d meteors, %d frames' % (num_meteors, frames))
+    print('Vector2 made per frame:           %10.1f' % (float(counter.count) / frames))
+    print('median peak temporary bytes:      %10d' % peaks[len(peaks) // 2])
+    print('median new live blocks per frame: %10d' % blocks[len(blocks) // 2])
+    print('gc collections (gen 0, 1, 2):     %10s' % (tuple(collections),))
+    print('')
+    print('%-10s %8s %8s %8s %8s %10s' % 
+          ('pool', 'hits', 'misses', 'in use', 'free', 'high water'))
+    for (cls, pool) in sorted(sim.pools.items(), key = lambda x: x[0].__name__):
+        stats = pool.stats()
+        print('%-10s %8d %8d %8d %8d %10d' % 
+              (cls.__name__, stats['hits'], stats['misses'], stats['in_use'], 
+               stats['free'], stats['high_water']))
+
+if __name__ == '__main__':
+    main()
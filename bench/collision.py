@@ -0,0 +1,37 @@
+# collision phase: spatial hash broad phase against the old all-pairs loop
+#   python bench/collision.py
+
+from common import *
+
+def nested_loop(sim):
+    # the collision loop Game.update used before the broad phase
+    for item1 in sim.items:
+        for item2 in sim.items:
+            if item1 != item2:
+                sim.collider.collide(item1, item2)
+
+def broad_phase(sim):
+    for (item1, item2) in sim.collision_pairs():
+        sim.collider.collide(item1, item2)
+
+def main():
+    print('%8s %14s %14s %8s %12s %12s' % 
+          ('meteors', 'nested (ms)', 'hashed (ms)', 'speedup', 'transforms', 'cache saved'))
+    stats = WObject.transform_stats
+    for n in [10, 100, 1000]:
+        sim = make_scene(n)
+        repeat = 5
+        if n >= 1000:
+            repeat = 1
+        t1 = best_time(lambda: nested_loop(sim), repeat)
+        t2 = best_time(lambda: broad_phase(sim), repeat)
+        # vertex transforms for one hashed frame, starting from a cold cache
+        sim.store.dirty[:] = True
+        stats.new_frame()
+        broad_phase(sim)
+        stats.new_frame()
+        print('%8d %14.3f %14.3f %7.1fx %12d %12d' % 
+              (n, t1 * 1000, t2 * 1000, t1 / t2, stats.last_computed, stats.saved()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# shared helpers for the benchmark scripts. run them from the top of the tree:
+#   python bench/collision.py
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meteors'))
+
+from vector import *
+from enums import *
+from objects import *
+from simulation import *
+
+class BenchSimulation(Simulation):
+    # a Simulation where the ship never dies, so a scene can be run for as
+    # long as you like
+    def _ch_ship_meteor(self, ship, meteor):
+        pass
+
+
+def make_scene(num_meteors, seed = 1, winx = 1920, winy = 1080,
+               cls = BenchSimulation):
+    # a game in play with a ship, a volley of bullets and num_meteors extra
+    # meteors of mixed size scattered over the screen, in a cls, which is a
+    # BenchSimulation or a subclass
+    random.seed(seed)
+    sim = cls((winx, winy))
+    sim.on_action(ACTION.start, True)
+    for i in range(num_meteors):
+        pos = Vector2(random.uniform(0, winx), random.uniform(0, winy))
+        m = random.choice([Meteor1, Meteor2, Meteor3, Meteor3])(pos, random.uniform(0, 360))
+        sim.add_item(m)
+        sim.meteors.append(m)
+    for i in range(10):
+        pos = Vector2(random.uniform(0, winx), random.uniform(0, winy))
+        sim.add_item(Bullet(pos, random.uniform(0, 360)))
+    # run one tick so objects have some history to sweep through
+    for item in sim.items:
+        item.update(1.0 / 60, sim.size)
+    return sim
+
+
+def best_time(fn, repeat = 5, number = 1):
+    # best wall clock time of fn in seconds
+    return min(timeit.repeat(fn, repeat = repeat, number = number)) / number
@@ -0,0 +1,115 @@
+# collision dispatch overhead per frame. the detectors are stubbed out so only
+# the cost of finding pairs and looking up their methods is measured
+#   python bench/dispatch.py
+
+from common import *
+from broadphase import *
+
+class NameCollider():
+    # the Collider as it was before dispatch by class: class name strings,
+    # looked up both ways round on every call
+    def __init__(self):
+        self.method_dict = dict()
+
+    def register_methods(self, detector, handler, type1, type2):
+        if not type1 in self.method_dict:
+            self.method_dict[type1] = dict()
+        self.method_dict[type1][type2] = [detector, handler]
+
+    def collide(self, obj1, obj2):
+        if obj1.remove or obj2.remove:
+            return False
+        type1 = obj1.__class__.__name__
+        type2 = obj2.__class__.__name__
+        methods1 = self._find_methods(type1, type2)
+        methods2 = self._find_methods(type2, type1)
+        if methods1 == None and methods2 == None:
+            return False
+        if methods1 != None:
+            return methods1[0](obj1, obj2)
+        elif methods2 != None:
+            return methods2[0](obj2, obj1)
+        return False
+
+    def _find_methods(self, type1, type2):
+        if type1 in self.method_dict:
+            if type2 in self.method_dict[type1]:
+                return self.method_dict[type1][type2]
+        return None
+
+
+class Counter():
+    def __init__(self):
+        self.count = 0
+
+    def detect(self, obj1, obj2):
+        self.count += 1
+        return False
+
+    def handle(self, obj1, obj2):
+        pass
+
+
+def name_collider(counter):
+    collider = NameCollider()
+    for meteor in ['Meteor1', 'Meteor2', 'Meteor3']:
+        collider.register_methods(counter.detect, counter.handle, 'Ship', meteor)
+        collider.register_methods(counter.detect, counter.handle, 'Bullet', meteor)
+    return collider
+
+def class_collider(counter):
+    collider = Collider()
+    collider.register_methods(counter.detect, counter.handle, Ship, Meteor)
+    collider.register_methods(counter.detect, counter.handle, Bullet, Meteor)
+    return collider
+
+def ordered_by_name(sim, collider):
+    # every ordered pair, the original Game.update loop
+    for item1 in sim.items:
+        for item2 in sim.items:
+            if item1 != item2:
+                collider.collide(item1, item2)
+    return len(sim.items) * (len(sim.items) - 1)
+
+def hashed_by_name(sim, collider):
+    # one spatial hash over all the objects
+    (winx, winy) = sim.size
+    grid = SpatialHash()
+    grid.rebuild(sim.items, winx, winy)
+    visited = 0
+    for (item1, item2) in grid.pairs():
+        collider.collide(item1, item2)
+        visited += 1
+    return visited
+
+def bucketed_by_class(sim, collider):
+    # per-class buckets, Simulation.collision_pairs()
+    visited = 0
+    for (item1, item2) in sim.collision_pairs():
+        collider.collide(item1, item2)
+        visited += 1
+    return visited
+
+def main():
+    print('%8s %-20s %10s %10s %12s' %
+          ('meteors', 'dispatch', 'pairs', 'detects', 'time (ms)'))
+    for n in [10, 100, 1000]:
+        sim = make_scene(n)
+        for (name, run, make) in [
+                ('ordered, by name', ordered_by_name, name_collider),
+                ('hashed, by name', hashed_by_name, name_collider),
+                ('bucketed, by class', bucketed_by_class, class_collider)]:
+            if n >= 1000 and run == ordered_by_name:
+                repeat = 1
+            else:
+                repeat = 5
+            counter = Counter()
+            collider = make(counter)
+            sim.collider = collider
+            pairs = run(sim, collider)
+            detects = counter.count
+            t = best_time(lambda: run(sim, collider), repeat)
+            print('%8d %-20s %10d %10d %12.3f' % (n, name, pairs, detects, t * 1000))
+
+if __name__ == '__main__':
+    main()
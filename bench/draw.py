@@ -0,0 +1,40 @@
+# drawing: one immediate mode WObject.draw() per object against the batched
+# Renderer. needs OpenGL, but not a display: the window is made headless (EGL)
+#   python bench/draw.py
+
+import pyglet
+pyglet.options['headless'] = True
+
+from common import *
+from render import *
+import pyglet.window
+from pyglet.gl import glFinish
+
+def immediate(sim):
+    for item in sim.items:
+        item.draw()
+    glFinish()
+
+def batched(sim):
+    sim.renderer.draw(sim.items, sim.store)
+    glFinish()
+
+def main():
+    (winx, winy) = (1920, 1080)
+    window = pyglet.window.Window(winx, winy)
+    window.on_resize(winx, winy)
+    print('%8s %16s %16s %16s %8s' % 
+          ('meteors', 'immediate (ms)', 'batched (ms)', 'vertex prep (ms)', 'speedup'))
+    for n in [10, 100, 1000, 5000]:
+        sim = make_scene(n, 1, winx, winy)
+        sim.renderer = Renderer()
+        repeat = 5
+        t1 = best_time(lambda: immediate(sim), repeat, 5)
+        t2 = best_time(lambda: batched(sim), repeat, 5)
+        t3 = best_time(lambda: sim.renderer.prepare(sim.items, sim.store), repeat, 5)
+        print('%8d %16.3f %16.3f %16.3f %7.1fx' % 
+              (n, t1 * 1000, t2 * 1000, t3 * 1000, t1 / t2))
+    window.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Font layout: score churn and long strings, against the old quadratic layout
+#   python bench/font.py
+
+from common import *
+
+def old_layout(font, string):
+    # Font._string_to_points as it was: glyphs rebuilt from CHAR_POINTS, the
+    # width found again for every character, and the list copied every time
+    sp = font.opts['spacing']
+    points = []
+    index = 0
+    for char in string:
+        if char in CHAR_POINTS:
+            char_points = font.to_points(CHAR_POINTS[char])
+        else:
+            char_points = []
+        extra = Vector2((1 + sp) * index, 0)
+        length = len(string)
+        if font.opts['just-x'] == 'center':
+            extra.x = extra.x - (length + sp * (length - 1)) / 2
+        for point in char_points:
+            point += extra
+        points = points + char_points
+        index += 1
+    return points
+
+def score_churn(font, layout, scores):
+    for score in scores:
+        layout(font, 'SCORE %d' % score)
+
+def new_layout(font, string):
+    font.set_string(string)
+    font.update(0, None)
+
+def cold_layout(font, string):
+    Font.layout_cache.clear()
+    new_layout(font, string)
+
+def main():
+    font = Font(Vector2(5, 1000), Vector2(10, 15), {'just-x' : 'left', 'just-y' : 'top'})
+    scores = [i * 25 for i in range(200)]
+    print('%-32s %12s %12s %12s' % ('', 'old (ms)', 'cold (ms)', 'cached (ms)'))
+    t1 = best_time(lambda: score_churn(font, old_layout, scores)) / len(scores)
+    t2 = best_time(lambda: score_churn(font, cold_layout, scores)) / len(scores)
+    t3 = best_time(lambda: score_churn(font, new_layout, scores)) / len(scores)
+    print('%-32s %12.4f %12.4f %12.4f' % ('score update', t1 * 1000, t2 * 1000, t3 * 1000))
+
+    font = Font(Vector2(960, 540), Vector2(20, 30), {'just-x' : 'center', 'just-y' : 'center'})
+    for length in [10, 100, 1000]:
+        string = ('MY BOTTOM GOES HBBFGBFHBGBFHGB ' * (length // 30 + 1))[:length]
+        t1 = best_time(lambda: old_layout(font, string))
+        t2 = best_time(lambda: cold_layout(font, string))
+        t3 = best_time(lambda: new_layout(font, string))
+        print('%-32s %12.4f %12.4f %12.4f' % 
+              ('%d character string' % length, t1 * 1000, t2 * 1000, t3 * 1000))
+
+if __name__ == '__main__':
+    main()
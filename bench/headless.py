@@ -0,0 +1,28 @@
+# how much faster than real time a whole game runs without a display
+#   python bench/headless.py
+
+from common import *
+
+def play(ticks, seed = 1):
+    # spin on the spot firing, starting a new game whenever one ends
+    random.seed(seed)
+    sim = Simulation((1024, 768))
+    for tick in range(ticks):
+        if sim.state != STATE.play:
+            sim.on_action(ACTION.start, True)
+        elif tick % 2 == 0:
+            sim.on_action(ACTION.left, True)
+            sim.on_action(ACTION.fire, True)
+        sim.update(1.0 / 60)
+    return sim
+
+def main():
+    ticks = 6000
+    t = best_time(lambda: play(ticks), 3)
+    sim = play(ticks)
+    print('%d ticks in %.3f s, %.0f ticks/s, %.0fx real time at 60Hz' % 
+          (ticks, t, ticks / t, ticks / t / 60))
+    print('finished on level %d with score %d' % (sim.level, sim.score))
+
+if __name__ == '__main__':
+    main()
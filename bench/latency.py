@@ -0,0 +1,84 @@
+# key press to frame latency, see latency.py, for a few shapes of main loop:
+# the frame rate, how long drawing takes, and whether events are dispatched
+# before or after the update. The loop is pyglet's, without a window: each
+# frame dispatches the key presses that have arrived since the last one,
+# runs the update, prepares the vertices (plus a busy wait to stand in for a
+# slow GPU), then sleeps until the next frame. Key presses arrive at random
+# times, 50 a second
+#   python bench/latency.py
+
+import time
+
+# the renderer only prepares vertices here, nothing is drawn, so no display
+#  or shadow window is needed
+import pyglet
+pyglet.options['shadow_window'] = False
+
+from common import *
+from render import *
+from latency import *
+
+LOOPS = [
+    # name, frames a second, extra draw time (ms), dispatch before update
+    ('60 Hz', 60, 0, True),
+    ('60 Hz, dispatch after update', 60, 0, False),
+    ('60 Hz, 10 ms draw', 60, 10, True),
+    ('30 Hz', 30, 0, True),
+    ('144 Hz', 144, 0, True),
+]
+
+def run(fps, draw_ms, dispatch_first, seconds = 3.0, rate = 50, seed = 1):
+    sim = make_scene(200)
+    rng = random.Random(seed)
+    renderer = Renderer()
+    steps = FixedStep()
+    inputs = InputPipeline()
+    def step(dt):
+        inputs.apply(sim.on_action)
+        sim.update(dt)
+    def dispatch(now):
+        while arrivals[0] <= now:
+            inputs.push(ACTION.left, len(arrivals) % 2 == 0, arrivals.pop(0))
+    start = clock()
+    # when each key press happens
+    arrivals = []
+    t = start
+    while t < start + seconds + 1:
+        t += rng.expovariate(rate)
+        arrivals.append(t)
+    frame = 1.0 / fps
+    last = start
+    next_frame = start
+    while clock() < start + seconds:
+        now = clock()
+        if dispatch_first:
+            dispatch(now)
+        steps.advance(now - last, step)
+        last = now
+        if not dispatch_first:
+            dispatch(clock())
+        renderer.prepare(sim.items, sim.store, steps.alpha, sim.size)
+        busy = clock() + draw_ms / 1000.0
+        while clock() < busy:
+            pass
+        inputs.presented()
+        next_frame += frame
+        time.sleep(max(0.0, next_frame - clock()))
+    return inputs
+
+def main():
+    columns = ['p50', 'p90', 'p99', 'max']
+    print('%-42s%-30s%s' % ('', 'wait for a tick (ms)', 'to frame (ms)'))
+    print('%-32s %8s ' % ('loop', 'presses') +
+          ''.join(['%7s' % c for c in columns]) + '  ' +
+          ''.join(['%7s' % c for c in columns]))
+    for (name, fps, draw_ms, dispatch_first) in LOOPS:
+        inputs = run(fps, draw_ms, dispatch_first)
+        wait = inputs.wait.summary()
+        frame = inputs.frame.summary()
+        print('%-32s %8d ' % (name, frame['count']) +
+              ''.join(['%7.1f' % wait[c] for c in columns]) + '  ' +
+              ''.join(['%7.1f' % frame[c] for c in columns]))
+
+if __name__ == '__main__':
+    main()
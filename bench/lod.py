@@ -0,0 +1,68 @@
+# frame costs against the number of meteors, with and without levels of
+# detail: drawing with and without a vertex budget (prep is the per frame
+# transform, all there is to a frame that isn't GL), and bullet collision
+# detection with and without the coarse hull early out
+#   python bench/lod.py
+
+# the renderer only prepares vertices here, nothing is drawn, so no display
+#  or shadow window is needed
+import pyglet
+pyglet.options['shadow_window'] = False
+
+from common import *
+import simulation
+from render import *
+
+def no_hulls(meteors, starts, ends):
+    return numpy.ones(len(meteors), numpy.bool_)
+
+def prep_time(sim, budget):
+    renderer = Renderer(budget)
+    renderer.prepare(sim.items, sim.store)
+    return (best_time(lambda: renderer.prepare(sim.items, sim.store), 5, 10),
+            len(renderer.model))
+
+def detect(sim):
+    # everything has moved, as it would have in a tick, so no shapes are
+    #  cached
+    sim.store.dirty[:] = True
+    sim.collider.collide_all(list(sim.collision_pairs()))
+
+def detect_time(sim):
+    return best_time(lambda: detect(sim), 5, 5)
+
+def volley(n, seed = 1):
+    # n meteors and as many bullets, each somewhere inside a meteor's
+    #  bounding circle, so every pair gets past the circle test
+    sim = make_scene(n, seed)
+    for meteor in list(sim.meteors):
+        angle = random.uniform(0, 2 * math.pi)
+        r = meteor.size.x * random.uniform(0.3, 0.5)
+        pos = Vector2(meteor.pos.x + r * math.cos(angle), meteor.pos.y + r * math.sin(angle))
+        bullet = Bullet(pos, random.uniform(0, 360))
+        sim.add_item(bullet)
+        sim.store.last_pos[bullet.slot] = (pos.x + random.uniform(-8, 8),
+                                           pos.y + random.uniform(-8, 8))
+    return sim
+
+def main():
+    print('%8s %12s %12s %12s %12s' %
+          ('meteors', 'vertices', 'prep (ms)', 'lod verts', 'lod prep'))
+    for n in [100, 300, 1000, 3000]:
+        sim = make_scene(n)
+        (full, full_count) = prep_time(sim, None)
+        (lod, lod_count) = prep_time(sim, 16384)
+        print('%8d %12d %12.3f %12d %12.3f' %
+              (n, full_count, full * 1000, lod_count, lod * 1000))
+    print('')
+    print('%8s %14s %14s' % ('bullets', 'detect (ms)', 'hull (ms)'))
+    for n in [25, 100, 300]:
+        sim = volley(n)
+        hull = detect_time(sim)
+        simulation.hull_overlaps = no_hulls
+        plain = detect_time(sim)
+        simulation.hull_overlaps = hull_overlaps
+        print('%8d %14.3f %14.3f' % (n, plain * 1000, hull * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# bytes each kind of object holds, and a 500 object scene in all, with shared
+# shapes and with the per object geometry every WObject used to make: a box,
+# a 48 line circle and a cross for debug drawing, and the ship and bullet
+# shapes as Vector2 lists and arrays of their own. Measured with tracemalloc
+#   python bench/memory.py
+
+import tracemalloc
+
+import numpy
+
+from common import *
+
+def old_geometry(obj):
+    # what WObject.__init__ and the Ship and Bullet constructors made for
+    #  each object as they were, beyond what they make now
+    square = obj.to_points([0, 0, 0, 1, 0, 1, 1, 1, 1, 1, 1, 0, 1, 0, 0, 0])
+    kept = [square,
+            numpy.array([(p.x, p.y) for p in square]),
+            obj.generate_circle(48),
+            obj.to_points([0, 0.5, 1, 0.5, 0.5, 0, 0.5, 1])]
+    if isinstance(obj, (Ship, Bullet)):
+        points = [Vector2(x, y) for (x, y) in obj.get_point_array().tolist()]
+        kept += [points, numpy.array([(p.x, p.y) for p in points])]
+    return kept
+
+def measure(make, old):
+    # bytes held by what make() returns, and by the old geometry for it too
+    #  if old is set
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = make()
+    kept = []
+    if old:
+        for obj in objects:
+            kept.append(old_geometry(obj))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before, len(objects))
+
+def make_kind(cls, count):
+    pos = Vector2(100, 100)
+    if cls == Ship:
+        return lambda: [Ship(pos) for i in range(count)]
+    return lambda: [cls(pos, 30) for i in range(count)]
+
+def make_world(count):
+    # count objects in all: make_scene()'s ship, bullets and text, and the
+    #  rest meteors
+    extra = len(make_scene(0).items)
+    return lambda: make_scene(count - extra).items
+
+def main(count = 500):
+    # make every shape once first, so it isn't counted against the objects
+    make_scene(10)
+    print('%-10s %14s %14s %8s' % ('', 'before (B)', 'after (B)', 'saved'))
+    for cls in [Meteor1, Meteor2, Meteor3, Bullet, Ship]:
+        random.seed(1)
+        (old, n) = measure(make_kind(cls, count), True)
+        random.seed(1)
+        (new, n) = measure(make_kind(cls, count), False)
+        print('%-10s %14.0f %14.0f %7.0f%%' %
+              (cls.__name__, old / n, new / n, 100.0 * (old - new) / old))
+    (old, n) = measure(make_world(count), True)
+    (new, n) = measure(make_world(count), False)
+    print('')
+    print('%d object scene: %.0f kB before, %.0f kB after, %.0f B per object saved' %
+          (n, old / 1024.0, new / 1024.0, float(old - new) / n))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# record a scripted game, check it plays back the same, and time fast forward
+# playback. with a file, plays that back and lists its slowest ticks
+#   python bench/playback.py [game.rep]
+
+import os
+import tempfile
+
+from common import *
+from tracing import clock
+from replay import *
+from batch import *
+
+def record(ticks, seed = 1):
+    # a bot that wanders about shooting, see batch.RandomPolicy
+    size = (1024, 768)
+    recording = Recording(seed, size)
+    sim = Simulation(size, seed)
+    sim.recorder = recording
+    bot = RandomPolicy().reset(seed)
+    for tick in range(ticks):
+        if sim.state != STATE.play:
+            sim.on_action(ACTION.start, True)
+            bot = RandomPolicy().reset(seed + tick)
+        else:
+            bot.act(sim)
+        sim.update(recording.step)
+    return (recording, sim)
+
+def fingerprint(sim):
+    # enough of the state to tell if two games went the same way
+    n = sim.store.count
+    return (sim.tick, sim.state, sim.level, sim.score, len(sim.items),
+            sim.store.pos[:n].tobytes())
+
+def play(recording):
+    # fast forward, returns the Simulation and the time of every tick
+    times = []
+    last = [clock()]
+    def on_tick(sim):
+        now = clock()
+        times.append(now - last[0])
+        last[0] = now
+    sim = Player(recording).play(on_tick)
+    return (sim, times)
+
+def report(recording, filename):
+    (sim, times) = play(recording)
+    total = sum(times)
+    print('%d ticks, %d inputs, %d bytes' % 
+          (recording.ticks, len(recording.events), os.path.getsize(filename)))
+    print('played in %.3f s, %.0f ticks/s, %.0fx real time' % 
+          (total, len(times) / total, len(times) * recording.step / total))
+    print('slowest ticks:')
+    for (t, tick) in sorted([(t, i) for (i, t) in enumerate(times)], reverse = True)[:5]:
+        print('  tick %6d %8.3f ms' % (tick, t * 1000))
+    return sim
+
+def main():
+    if len(sys.argv) > 1:
+        report(Recording.load(sys.argv[1]), sys.argv[1])
+        return
+
+    (recording, sim1) = record(20000)
+    filename = os.path.join(tempfile.mkdtemp(), 'bench.rep')
+    recording.save(filename)
+    loaded = Recording.load(filename)
+    assert loaded.events == recording.events
+    sim2 = report(loaded, filename)
+    same = fingerprint(sim1) == fingerprint(sim2)
+    print('final score %d, level %d, playback %s' % 
+          (sim2.score, sim2.level, 'matches' if same else 'DIFFERS'))
+    if not same:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# check that SegmentBatch gives exactly the answers Line.intersect() does,
+# for every way of testing a batch: intersect() with one Line, intersect_pairs()
+# and intersect_batch(). Random segments, then the awkward cases: parallel,
+# collinear and overlapping, touching at an end, T junctions, vertical and
+# horizontal, and zero length. Exits 1 on any difference
+#   python bench/segments.py
+
+import numpy
+
+from common import *
+
+def random_segments(rng, n, size = 100.0):
+    return rng.uniform(0, size, (n, 2, 2))
+
+def grid_segments(rng, n, size = 4):
+    # on a small integer grid, so many pairs share ends, overlap, are
+    # parallel or have zero length
+    return rng.randint(0, size + 1, (n, 2, 2)).astype(numpy.float64)
+
+def parallel_pairs(rng, n):
+    # a segment and a copy moved sideways, or along itself
+    first = random_segments(rng, n)
+    offset = rng.uniform(-5, 5, (n, 1, 2))
+    along = (first[:, 1:] - first[:, :1]) * rng.uniform(-1.5, 1.5, (n, 1, 1))
+    second = numpy.where(rng.rand(n, 1, 1) < 0.5, first + offset, first + along)
+    return first, second
+
+def collinear_pairs(rng, n):
+    # two stretches of the same line, overlapping, touching or apart
+    start = rng.uniform(0, 100, (n, 1, 2))
+    direction = rng.uniform(-10, 10, (n, 1, 2))
+    t = numpy.sort(rng.uniform(-1, 3, (n, 4, 1)), axis = 1)
+    t = t[:, rng.permutation(4)]
+    points = start + t * direction
+    return points[:, :2], points[:, 2:]
+
+def touching_pairs(rng, n):
+    # segments which share an end, or where one ends on the other
+    first = random_segments(rng, n)
+    second = random_segments(rng, n)
+    which = rng.randint(0, 3, n)
+    second[which == 0, 0] = first[which == 0, 0]
+    second[which == 1, 0] = first[which == 1, 1]
+    t = rng.uniform(0, 1, (n, 1))
+    on = first[:, 0] + t * (first[:, 1] - first[:, 0])
+    second[which == 2, 0] = on[which == 2]
+    return first, second
+
+def flat_pairs(rng, n):
+    # vertical and horizontal segments, crossing or meeting on the grid
+    first = grid_segments(rng, n, 8)
+    second = grid_segments(rng, n, 8)
+    first[::2, 1, 0] = first[::2, 0, 0]
+    first[1::2, 1, 1] = first[1::2, 0, 1]
+    second[::3, 1, 0] = second[::3, 0, 0]
+    second[1::3, 1, 1] = second[1::3, 0, 1]
+    return first, second
+
+def to_line(segment):
+    return Line(Vector2(float(segment[0][0]), float(segment[0][1])),
+                Vector2(float(segment[1][0]), float(segment[1][1])))
+
+def to_batch(segments):
+    return SegmentBatch(segments[:, 0], segments[:, 1])
+
+def check(name, first, second):
+    # first[i] against second[i] in each of the ways, returns the number of
+    #  differences
+    lines1 = [to_line(s) for s in first]
+    lines2 = [to_line(s) for s in second]
+    expected = numpy.array([lines2[i].intersect(lines1[i]) for i in range(len(lines1))])
+    batch1 = to_batch(first)
+    batch2 = to_batch(second)
+    pairs = batch1.intersect_pairs(batch2)
+    single = numpy.array([batch1.take([i]).intersect(lines2[i])[0]
+                          for i in range(len(lines1))])
+    # every combination of the first few, against every combination by Line
+    m = min(40, len(lines1))
+    every = batch1.take(slice(0, m)).intersect_batch(batch2.take(slice(0, m)))
+    every_expected = numpy.array([[lines2[j].intersect(lines1[i])
+                                   for i in range(m)] for j in range(m)])
+    bad = (numpy.count_nonzero(pairs != expected) +
+           numpy.count_nonzero(single != expected) +
+           numpy.count_nonzero(every != every_expected))
+    print('%-12s %6d pairs %6d intersect %6d differ' %
+          (name, len(expected), numpy.count_nonzero(expected), bad))
+    return bad
+
+def main(n = 2000, seed = 1):
+    rng = numpy.random.RandomState(seed)
+    cases = [
+        ('random', (random_segments(rng, n), random_segments(rng, n))),
+        ('grid', (grid_segments(rng, n), grid_segments(rng, n))),
+        ('parallel', parallel_pairs(rng, n)),
+        ('collinear', collinear_pairs(rng, n)),
+        ('touching', touching_pairs(rng, n)),
+        ('flat', flat_pairs(rng, n)),
+    ]
+    bad = 0
+    for (name, (first, second)) in cases:
+        bad += check(name, first, second)
+    if bad > 0:
+        print('%d differences' % bad)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
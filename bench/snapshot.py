@@ -0,0 +1,84 @@
+# cost and size of world snapshots, see snapshot.py: taking one, encoding it
+# as a key snapshot and as a delta on the tick before, and decoding, then a
+# spectator stream over a Unix socket with one spectator keeping up and one
+# that never reads
+#   python bench/snapshot.py
+
+import os
+import tempfile
+
+from common import *
+from snapshot import *
+
+def costs():
+    print('%8s %8s %12s %12s %12s %12s %10s %10s' %
+          ('objects', 'meteors', 'capture (ms)', 'key (ms)', 'delta (ms)',
+           'decode (ms)', 'key (B)', 'delta (B)'))
+    for n in [100, 1000]:
+        sim = make_scene(n)
+        encoder = SnapshotEncoder()
+        decoder = SnapshotDecoder()
+        before = encoder.capture(sim)
+        first = encoder.encode(before, True)
+        sim.update(1.0 / 60)
+        after = encoder.capture(sim)
+        capture = best_time(lambda: encoder.capture(sim), 5, 20)
+        key = encoder.encode(after, True)
+        key_time = best_time(lambda: encoder.encode(after, True), 5, 20)
+        def delta():
+            encoder.base = before
+            return encoder.encode(after)
+        data = delta()
+        delta_time = best_time(delta, 5, 20)
+        def decode():
+            decoder.decode(first)
+            return decoder.decode(data)
+        decoded = decode()
+        decode_time = best_time(decode, 5, 20) - best_time(lambda: decoder.decode(first), 5, 20)
+        assert decoded.dynamic.tobytes() == after.dynamic.tobytes()
+        print('%8d %8d %12.3f %12.3f %12.3f %12.3f %10d %10d' %
+              (len(sim.items), len(sim.meteors), capture * 1000,
+               key_time * 1000, delta_time * 1000, decode_time * 1000,
+               len(key), len(data)))
+
+def stream(ticks = 600, rate = 30):
+    sim = make_scene(1000)
+    path = os.path.join(tempfile.mkdtemp(), 'meteors.sock')
+    server = SpectatorServer(path, rate, max_backlog = 256 * 1024)
+    watcher = SpectatorClient(path)
+    # connects, but never reads
+    stalled = SpectatorClient(path)
+    times = []
+    received = []
+    for tick in range(ticks):
+        sim.update(1.0 / 60)
+        start = clock()
+        taken = server.publish(sim)
+        times.append(clock() - start)
+        if taken:
+            sent = server.encoder.base
+        received += watcher.receive()
+    received += watcher.receive(0.1)
+    times.sort()
+    last = received[-1]
+    ok = (last.tick == sent.tick and
+          last.dynamic.tobytes() == sent.dynamic.tobytes() and
+          last.statics == sent.statics)
+    print('')
+    print('%d ticks, %d snapshots a second, %d objects: publish median %.3f ms, '
+          'max %.3f ms' % (ticks, rate, len(sim.items), times[len(times) // 2] * 1000,
+                           times[-1] * 1000))
+    print('spectator got %d of %d snapshots, last one matches the world: %s' %
+          (len(received), server.published, ok))
+    print('stalled spectator: queue dropped %d times, %d bytes waiting' %
+          (server.dropped, sum([client.backlog for client in server.clients])))
+    watcher.close()
+    stalled.close()
+    server.close()
+
+def main():
+    costs()
+    stream()
+
+if __name__ == '__main__':
+    main()
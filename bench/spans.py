@@ -0,0 +1,31 @@
+# cost of the tracing spans, and an example trace of a busy scene
+#   python bench/spans.py [trace.json]
+
+from common import *
+from tracing import *
+
+def play(sim, ticks):
+    for tick in range(ticks):
+        sim.update(1.0 / 60)
+
+def main():
+    ticks = 200
+    print('%-24s %12s' % ('tracing', 'tick (ms)'))
+    for (name, make) in [('none', lambda: None),
+                         ('disabled', lambda: Tracer()),
+                         ('enabled', lambda: Tracer())]:
+        sim = make_scene(1000)
+        tracer = make()
+        sim.set_tracer(tracer)
+        if name == 'enabled':
+            tracer.enable()
+        t = best_time(lambda: play(sim, ticks), 3)
+        print('%-24s %12.3f' % (name, t * 1000 / ticks))
+
+    print('')
+    print(sim.tracer.format_summary())
+    if len(sys.argv) > 1:
+        sim.tracer.write_chrome_trace(sys.argv[1])
+
+if __name__ == '__main__':
+    main()
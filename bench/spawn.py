@@ -0,0 +1,74 @@
+# time to start a level against the level number: placing the meteors, and
+# the old placement loop, which checks every meteor so far and never gives up,
+# for comparison. it is stopped after too many tries and shown as stuck
+#   python bench/spawn.py
+
+from common import *
+
+STUCK = 100000
+
+def linear_placement(sim):
+    # add_meteor1() placement as it was, returns the number of tries, or
+    #  None if it got stuck
+    (winx, winy) = sim.size
+    last_poses = []
+    tries = 0
+    for i in range(sim.level):
+        search = True
+        while search:
+            tries += 1
+            if tries > STUCK:
+                return None
+            pos = Vector2(random.uniform(0, winx), random.uniform(0, winy))
+            search = False
+            for last_pos in last_poses:
+                if pos.dist2(last_pos) < 20000:
+                    search = True
+                    break
+            if pos.dist2(sim.ship.pos) < 20000:
+                search = True
+        last_poses.append(pos)
+    return tries
+
+def scatter_placement(sim):
+    # add_meteor1() placement now, returns the Scatter
+    (winx, winy) = sim.size
+    scatter = Scatter(winx, winy, math.sqrt(20000))
+    scatter.avoid(sim.ship.pos)
+    for i in range(sim.level):
+        scatter.place()
+    return scatter
+
+def level_start(sim, level):
+    # the level screen, then play, as the start key does
+    sim.level = level - 1
+    sim._init_level()
+    sim._init_play()
+
+def main():
+    for size in [(1024, 768), (640, 480)]:
+        print('%d x %d' % size)
+        print('%6s %14s %10s %10s %14s %10s' %
+              ('level', 'start (ms)', 'tries', 'too close', 'old (ms)', 'old tries'))
+        for level in [1, 2, 4, 8, 16, 32, 64, 128]:
+            random.seed(level)
+            sim = Simulation(size)
+            level_start(sim, level)
+            t = best_time(lambda: level_start(sim, level), 3)
+            random.seed(level)
+            scatter = scatter_placement(sim)
+            random.seed(level)
+            start = clock()
+            tries = linear_placement(sim)
+            old = clock() - start
+            if tries == None:
+                old = 'stuck'
+                tries = '>%d' % STUCK
+            else:
+                old = '%.3f' % (old * 1000)
+            print('%6d %14.3f %10d %10d %14s %10s' %
+                  (level, t * 1000, scatter.attempts, scatter.fallbacks, old, tries))
+        print('')
+
+if __name__ == '__main__':
+    main()
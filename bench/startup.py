@@ -0,0 +1,96 @@
+# startup: how long importing each part of the game takes in a fresh
+# interpreter, whether that pulls in pyglet's GL bindings, and the time to
+# the first frame drawn. Modules which draw, and the first frame, use a
+# headless (EGL) window, so no display is needed
+#   python bench/startup.py
+
+import os
+import sys
+import time
+import subprocess
+
+METEORS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'meteors')
+
+# module, needs a GL context
+MODULES = [
+    ('numpy', False),
+    ('simulation', False),
+    ('replay', False),
+    ('batch', False),
+    ('snapshot', False),
+    ('pyglet.gl', True),
+    ('render', True),
+    ('game', True),
+    ('main', True),
+]
+
+IMPORT = '''
+import time
+start = time.perf_counter()
+if %(gl)s:
+    import pyglet
+    pyglet.options['headless'] = True
+import %(module)s
+import sys
+print(time.perf_counter() - start, 'pyglet.gl' in sys.modules)
+'''
+
+FIRST_FRAME = '''
+import time
+start = time.perf_counter()
+import pyglet
+pyglet.options['headless'] = True
+from pyglet.gl import glFinish
+from game import Game
+imported = time.perf_counter()
+window = pyglet.window.Window(1024, 768)
+game = Game(window)
+game.update(1.0 / 60)
+game.draw()
+glFinish()
+window.flip()
+print(imported - start, time.perf_counter() - start)
+'''
+
+def run(code):
+    # what code prints, split into words
+    output = subprocess.check_output([sys.executable, '-c', code], cwd = METEORS)
+    return output.decode().split()
+
+def best(code, repeat = 5):
+    # the run with the smallest first value
+    runs = [run(code) for i in range(repeat)]
+    return min(runs, key = lambda result: float(result[0]))
+
+def python_start(repeat = 5):
+    # seconds python takes to start and exit doing nothing
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', 'pass'])
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    print('python itself starts and exits in %.1f ms, on top of these' %
+          (python_start() * 1000))
+    print('')
+    print('%-12s %12s %10s' % ('import', 'time (ms)', 'pyglet.gl'))
+    for (module, gl) in MODULES:
+        try:
+            (seconds, loaded) = best(IMPORT % {'module': module, 'gl': gl})
+        except subprocess.CalledProcessError:
+            print('%-12s %12s' % (module, 'failed'))
+            continue
+        print('%-12s %12.1f %10s' % (module, float(seconds) * 1000,
+                                     'yes' if loaded == 'True' else 'no'))
+    print('')
+    try:
+        (imported, frame) = best(FIRST_FRAME)
+        print('first frame drawn %.1f ms after the script started, '
+              '%.1f ms of that importing' % (float(frame) * 1000, float(imported) * 1000))
+    except subprocess.CalledProcessError:
+        print('first frame: no headless GL here')
+
+if __name__ == '__main__':
+    main()
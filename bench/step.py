@@ -0,0 +1,39 @@
+# object update phase: one python update() per object against one vectorized
+# Store.step() for the whole world
+#   python bench/step.py
+
+from common import *
+
+def per_object(sim):
+    for item in sim.items:
+        item.update(1.0 / 60, sim.size)
+
+def vectorized(sim):
+    (winx, winy) = sim.size
+    for item in sim.items:
+        if item.motion == MOTION.custom:
+            item.update(1.0 / 60, sim.size)
+    sim.store.step(1.0 / 60, winx, winy)
+
+def main():
+    print('%8s %16s %16s %8s' % ('meteors', 'update() (ms)', 'step() (ms)', 'speedup'))
+    for n in [10, 100, 1000, 5000]:
+        sim = make_scene(n)
+        t1 = best_time(lambda: per_object(sim), 5, 10)
+        t2 = best_time(lambda: vectorized(sim), 5, 10)
+        print('%8d %16.3f %16.3f %7.1fx' % (n, t1 * 1000, t2 * 1000, t1 / t2))
+
+    # the history is a ring buffer, so a long one shouldn't cost anything extra
+    print('')
+    print('%8s %16s' % ('history', 'step() (ms)'))
+    for history in [5, 50, 500]:
+        sim = make_scene(1000)
+        store = Store(len(sim.items), history)
+        for item in sim.items:
+            store.adopt(item)
+        sim.store = store
+        t = best_time(lambda: vectorized(sim), 5, 10)
+        print('%8d %16.3f' % (history, t * 1000))
+
+if __name__ == '__main__':
+    main()
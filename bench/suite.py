@@ -0,0 +1,249 @@
+# the whole benchmark suite: seeded scenes, each phase of a tick timed on its
+# own, plus the vector.py primitives. results can be saved as JSON and
+# compared against an earlier run
+#   python bench/suite.py --out baseline.json
+#   python bench/suite.py --compare baseline.json
+# the exit status is 1 if anything got slower than --threshold allows
+
+import json
+import platform
+import argparse
+
+# the renderer only prepares vertices here, nothing is drawn, so no display
+#  or shadow window is needed
+import pyglet
+pyglet.options['shadow_window'] = False
+
+from common import *
+from render import *
+
+FRAME = 1.0 / 60
+
+# scenes, each is built from a seed so every run sees the same objects
+
+class ScoreSimulation(BenchSimulation):
+    # scores on every tick, so the score text is laid out again every frame
+    def update_items(self, frame_time):
+        self.add_to_score(random.choice([25, 50, 100]))
+        BenchSimulation.update_items(self, frame_time)
+
+
+def scene_meteors(n):
+    # n meteors of mixed sizes drifting about
+    def build(seed):
+        return make_scene(n, seed)
+    return build
+
+def scene_thrust(n):
+    # the ship under full thrust and turning, so it is dirty every tick and
+    #  wraps round the screen
+    def build(seed):
+        sim = make_scene(n, seed)
+        sim.on_action(ACTION.forward, True)
+        sim.on_action(ACTION.left, True)
+        return sim
+    return build
+
+def scene_volley(n):
+    # a bullet in the middle of every meteor that has just flown in from
+    #  outside it, so every meteor is hit and the handlers split them up
+    def build(seed):
+        sim = make_scene(n, seed)
+        for item in list(sim.items):
+            if isinstance(item, Bullet):
+                sim.remove_item(item)
+        for meteor in list(sim.meteors):
+            bullet = Bullet(meteor.pos, 0)
+            sim.add_item(bullet)
+            sim.store.last_pos[bullet.slot] = (meteor.pos.x + meteor.size.x * 2,
+                                               meteor.pos.y)
+        return sim
+    return build
+
+def scene_score(n):
+    def build(seed):
+        return make_scene(n, seed, cls = ScoreSimulation)
+    return build
+
+SCENES = [
+    ('meteors-100', scene_meteors(100)),
+    ('meteors-1000', scene_meteors(1000)),
+    ('thrust-200', scene_thrust(200)),
+    ('volley-200', scene_volley(200)),
+    ('score-200', scene_score(200)),
+]
+
+# phases of a tick. setup(sim) is not timed and returns the argument for
+#  run(). Every timing starts from a newly built scene, so runs see the same
+#  ticks and can be compared. fresh phases change the scene in a way that
+#  can't be repeated, so they're run once per scene
+
+def phase_update(sim):
+    return sim
+
+def run_update(sim):
+    sim.update_items(FRAME)
+
+def phase_detect(sim):
+    return sim
+
+def run_detect(sim):
+    # broad and narrow phase, nothing is handled
+    sim.collider.collide_all(list(sim.collision_pairs()))
+
+def phase_handle(sim):
+    pairs = list(sim.collision_pairs())
+    hits = sim.collider.collide_all(pairs)
+    return (sim, [pairs[i] for i in range(len(pairs)) if hits[i]])
+
+def run_handle(arg):
+    # as in a tick: removes and spawns are queued and applied once at the end
+    (sim, hits) = arg
+    sim.updating = True
+    for (item1, item2) in hits:
+        sim.collider.handle(item1, item2)
+        for item in [item1, item2]:
+            if item.remove:
+                sim.remove_item(item)
+    sim.updating = False
+    sim._commit()
+
+def phase_prep(sim):
+    renderer = Renderer()
+    # the first prepare() lays everything out, time the frames after that
+    renderer.prepare(sim.items, sim.store)
+    return (renderer, sim)
+
+def run_prep(arg):
+    (renderer, sim) = arg
+    renderer.prepare(sim.items, sim.store)
+
+# (name, setup, run, fresh)
+PHASES = [
+    ('update', phase_update, run_update, False),
+    ('detect', phase_detect, run_detect, False),
+    ('handle', phase_handle, run_handle, True),
+    ('prep', phase_prep, run_prep, False),
+]
+
+def time_phase(build, setup, run, fresh, seed, repeat, number):
+    # best time of one run, in seconds
+    if fresh:
+        number = 1
+    times = []
+    for i in range(repeat):
+        arg = setup(build(seed))
+        times.append(best_time(lambda: run(arg), 1, number))
+    return min(times)
+
+# vector.py primitives, (name, setup, statement, number of runs per timing)
+
+PRIMITIVES = [
+    ('Vector2.__add__', 'a = Vector2(1.0, 2.0); b = Vector2(3.0, 4.0)', 'a + b', 100000),
+    ('Vector2.__iadd__', 'a = Vector2(1.0, 2.0); b = Vector2(3.0, 4.0)', 'a += b', 100000),
+    ('Vector2.add_scaled', 'a = Vector2(1.0, 2.0); b = Vector2(3.0, 4.0)',
+     'a.add_scaled(b, 0.5)', 100000),
+    ('Vector2.dist2', 'a = Vector2(1.0, 2.0); b = Vector2(3.0, 4.0)', 'a.dist2(b)', 100000),
+    ('Line.__init__', 'a = Vector2(0.0, 0.0); b = Vector2(3.0, 4.0)', 'Line(a, b)', 100000),
+    ('Line.intersect hit',
+     'l1 = Line(Vector2(0.0, 0.0), Vector2(4.0, 4.0)); '
+     'l2 = Line(Vector2(0.0, 4.0), Vector2(4.0, 0.0))',
+     'l1.intersect(l2)', 100000),
+    ('Line.intersect miss',
+     'l1 = Line(Vector2(0.0, 0.0), Vector2(1.0, 1.0)); '
+     'l2 = Line(Vector2(3.0, 4.0), Vector2(4.0, 3.0))',
+     'l1.intersect(l2)', 100000),
+    ('Line.intersection',
+     'l1 = Line(Vector2(0.0, 0.0), Vector2(4.0, 4.0)); '
+     'l2 = Line(Vector2(0.0, 4.0), Vector2(4.0, 0.0))',
+     'l1.intersection(l2)', 100000),
+    ('SegmentBatch.intersect 16',
+     'import numpy; b = SegmentBatch.from_points(numpy.random.RandomState(1).rand(32, 2)); '
+     'l = Line(Vector2(0.0, 0.0), Vector2(1.0, 1.0))',
+     'b.intersect(l)', 2000),
+    ('SegmentBatch.intersect_pairs 1k',
+     'import numpy; b1 = SegmentBatch.from_points(numpy.random.RandomState(1).rand(2000, 2)); '
+     'b2 = SegmentBatch.from_points(numpy.random.RandomState(2).rand(2000, 2))',
+     'b1.intersect_pairs(b2)', 2000),
+    ('BoundingCircle.inside',
+     'c = BoundingCircle(Vector2(0.0, 0.0), 10.0); p = Vector2(3.0, 4.0)',
+     'c.inside(p)', 100000),
+]
+
+def time_primitive(setup, stmt, repeat, number):
+    t = timeit.repeat(stmt, 'from vector import Vector2, Line, SegmentBatch, BoundingCircle; ' + setup,
+                      repeat = repeat, number = number)
+    return min(t) / number
+
+# running and comparing
+
+def run(repeat, number, match):
+    results = dict()
+    for (scene, build) in SCENES:
+        for (phase, setup, fn, fresh) in PHASES:
+            name = '%s/%s' % (phase, scene)
+            if match and match not in name:
+                continue
+            results[name] = time_phase(build, setup, fn, fresh, 1, repeat, number)
+            print('%-36s %12.3f ms' % (name, results[name] * 1000))
+    for (prim, setup, stmt, count) in PRIMITIVES:
+        name = 'vector/%s' % prim
+        if match and match not in name:
+            continue
+        results[name] = time_primitive(setup, stmt, repeat, count)
+        print('%-36s %12.3f us' % (name, results[name] * 1e6))
+    return results
+
+def compare(results, baseline, threshold):
+    # returns the names of the results which are slower than the baseline
+    #  by more than threshold (0.1 is 10%)
+    regressions = []
+    print('')
+    print('%-36s %12s %12s %8s' % ('benchmark', 'baseline', 'now', 'change'))
+    for name in sorted(results.keys()):
+        if name not in baseline:
+            print('%-36s %12s %12.4g %8s' % (name, '-', results[name], 'new'))
+            continue
+        base = baseline[name]
+        change = results[name] / base - 1
+        flag = ''
+        if change > threshold:
+            flag = '  SLOWER'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  faster'
+        print('%-36s %12.4g %12.4g %+7.1f%%%s' %
+              (name, base, results[name], change * 100, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description = 'meteors benchmark suite')
+    parser.add_argument('--out', help = 'save the results to this JSON file')
+    parser.add_argument('--compare', help = 'compare against this JSON file')
+    parser.add_argument('--threshold', type = float, default = 0.1,
+                        help = 'fraction slower that counts as a regression')
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--number', type = int, default = 10,
+                        help = 'ticks per timing for the phases')
+    parser.add_argument('--match', help = 'only run benchmarks with this in the name')
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.number, args.match)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'repeat': args.repeat,
+                       'number': args.number,
+                       'results': results}, f, indent = 2, sort_keys = True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if len(regressions) > 0:
+            print('')
+            print('%d regressions' % len(regressions))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
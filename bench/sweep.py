@@ -0,0 +1,59 @@
+# a difficulty sweep: many seeded games over several start levels and input
+# policies, run on a process pool. reports throughput for 1 worker and for
+# every core
+#   python bench/sweep.py [games]
+
+from common import *
+from batch import *
+
+def specs(games):
+    policies = [IdlePolicy(), SpinPolicy(), RandomPolicy()]
+    result = []
+    for seed in range(games):
+        policy = policies[seed % len(policies)]
+        level = 1 + (seed // len(policies)) % 4
+        result.append(GameSpec(seed, policy, level, max_ticks = 60 * 30))
+    return result
+
+def main():
+    games = 96
+    if len(sys.argv) > 1:
+        games = int(sys.argv[1])
+
+    print('%8s %10s %10s %12s %14s' % 
+          ('workers', 'games', 'time (s)', 'games/s', 'games/s/core'))
+    for workers in sorted(set([1, multiprocessing.cpu_count()])):
+        batch = Batch(workers)
+        results = list(batch.run(specs(games)))
+        print('%8d %10d %10.2f %12.1f %14.1f' % 
+              (workers, batch.games, batch.elapsed, 
+               batch.games_per_second(), batch.games_per_second_per_core()))
+
+    # the results of the last run, by policy and start level
+    print('')
+    print('%-14s %6s %8s %10s %10s %8s' % 
+          ('policy', 'level', 'games', 'mean score', 'mean ticks', 'died'))
+    groups = dict()
+    for result in results:
+        key = (result['policy'], result['start_level'])
+        groups.setdefault(key, []).append(result)
+    for key in sorted(groups.keys()):
+        group = groups[key]
+        n = len(group)
+        print('%-14s %6d %8d %10.0f %10.0f %7.0f%%' % 
+              (key[0], key[1], n,
+               sum([r['score'] for r in group]) / float(n),
+               sum([r['ticks'] for r in group]) / float(n),
+               100.0 * sum([r['died'] for r in group]) / n))
+
+    # where the time went, over all games
+    print('')
+    phases = dict()
+    for result in results:
+        for (name, t) in result['phases'].items():
+            phases[name] = phases.get(name, 0) + t
+    for name in sorted(phases.keys()):
+        print('%-36s %10.3f s' % (name, phases[name]))
+
+if __name__ == '__main__':
+    main()
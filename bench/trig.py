@@ -0,0 +1,106 @@
+# accuracy and speed of fastmath against the code it replaces: heading() next
+# to deg_to_vel() as it was, and sin/cos tables at a few resolutions next to
+# math.sin() and numpy.sin(), to show a table doesn't pay
+#   python bench/trig.py
+
+import numpy
+
+from common import *
+from fastmath import *
+
+def old_deg_to_vel(deg):
+    # WObject.deg_to_vel() as it was
+    y = abs(math.tan(math.radians(deg-90)))
+    x = 1
+    if deg > 0 and deg < 180:
+        x = -1
+    if deg > 90 and deg < 270:
+        y = -y
+    return Vector2(x, y).normalize()
+
+class TrigTable():
+    # Precomputed sin and cos at every resolution degrees.
+    # With interpolate the result is linear between the two nearest entries,
+    # otherwise it's the nearest entry. The error is about
+    # (resolution in radians) ** 2 / 8 interpolated, resolution / 2 not.
+    # On CPython a table is no faster than math.sin(), or numpy.sin() on an
+    # array: the lookup itself costs as much as the library call, so the game
+    # uses sin_cos() and heading() and the table only lives here.
+    def __init__(self, resolution = 0.25, interpolate = True):
+        self.resolution = float(resolution)
+        self.interpolate = interpolate
+        self.size = int(round(360.0 / self.resolution))
+        # two extra entries, so interpolating from the last one needs no
+        #  wrap, nor does a deg % 360 that rounds up to 360
+        rad = numpy.radians(numpy.arange(self.size + 2) * (360.0 / self.size))
+        self.sin_table = numpy.sin(rad)
+        self.cos_table = numpy.cos(rad)
+        self._sin = self.sin_table.tolist()
+        self._cos = self.cos_table.tolist()
+        self._scale = self.size / 360.0
+
+    def sin(self, deg):
+        return self._lookup(self._sin, deg)
+
+    def cos(self, deg):
+        return self._lookup(self._cos, deg)
+
+    def sin_cos(self, deg):
+        return (self._lookup(self._sin, deg), self._lookup(self._cos, deg))
+
+    def _lookup(self, table, deg):
+        f = (deg % 360) * self._scale
+        i = int(f)
+        if not self.interpolate:
+            return table[int(f + 0.5)]
+        a = table[i]
+        return a + (table[i + 1] - a) * (f - i)
+
+    def sin_array(self, degs):
+        return self._lookup_array(self.sin_table, degs)
+
+    def cos_array(self, degs):
+        return self._lookup_array(self.cos_table, degs)
+
+    def _lookup_array(self, table, degs):
+        f = numpy.mod(degs, 360) * self._scale
+        if not self.interpolate:
+            return table[numpy.rint(f).astype(numpy.intp)]
+        i = f.astype(numpy.intp)
+        a = table[i]
+        return a + (table[i + 1] - a) * (f - i)
+
+def main():
+    rng = random.Random(1)
+    degs = [rng.uniform(0, 360) for i in range(10000)]
+    array = numpy.array(degs[:1000])
+
+    error = 0.0
+    for deg in degs:
+        a = old_deg_to_vel(deg)
+        b = heading(deg)
+        error = max(error, abs(a.x - b.x), abs(a.y - b.y))
+    print('%-28s %12s %12s' % ('heading', 'max error', 'time (us)'))
+    t = best_time(lambda: [old_deg_to_vel(deg) for deg in degs], 5) / len(degs)
+    print('%-28s %12s %12.3f' % ('old deg_to_vel', '-', t * 1e6))
+    t = best_time(lambda: [heading(deg) for deg in degs], 5) / len(degs)
+    print('%-28s %12.2g %12.3f' % ('heading', error, t * 1e6))
+    print('')
+
+    print('%-28s %12s %12s %16s' % ('sin', 'max error', 'time (us)', '1000 array (us)'))
+    t = best_time(lambda: [math.sin(math.radians(deg)) for deg in degs], 5) / len(degs)
+    ta = best_time(lambda: numpy.sin(numpy.radians(array)), 5, 100)
+    print('%-28s %12s %12.3f %16.3f' % ('math.sin, numpy.sin', '-', t * 1e6, ta * 1e6))
+    exact = numpy.sin(numpy.radians(numpy.array(degs)))
+    for resolution in [1, 0.25, 0.05]:
+        for interpolate in [False, True]:
+            table = TrigTable(resolution, interpolate)
+            error = numpy.abs(numpy.array([table.sin(deg) for deg in degs]) - exact).max()
+            error = max(error, numpy.abs(table.sin_array(numpy.array(degs)) - exact).max())
+            t = best_time(lambda: [table.sin(deg) for deg in degs], 5) / len(degs)
+            ta = best_time(lambda: table.sin_array(array), 5, 100)
+            name = 'table %g deg%s' % (resolution, ', interpolated' if interpolate else '')
+            print('%-28s %12.2g %12.3f %16.3f' % (name, error, t * 1e6, ta * 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# the Simulation in a worker process, see remote.py: what publishing a frame
+# costs the worker and reading one costs the window, and how steadily the
+# worker ticks while the window stalls
+#   python bench/worker.py
+
+import time
+
+from common import *
+from remote import *
+
+def frame_costs():
+    print('%8s %10s %14s %14s' % ('meteors', 'vertices', 'publish (ms)', 'read (ms)'))
+    for n in [100, 1000]:
+        sim = make_scene(n)
+        frames = SharedFrames()
+        writer = Renderer()
+        reader = Renderer()
+        frames.publish(sim, writer)
+        frames.read(reader, 1.0 / 60)
+        publish = best_time(lambda: frames.publish(sim, writer), 5, 20)
+        read = best_time(lambda: frames.read(reader, 1.0 / 60), 5, 20)
+        print('%8d %10d %14.3f %14.3f' %
+              (n, len(reader.model), publish * 1000, read * 1000))
+        frames.close()
+
+def stalls(seconds = 3.0, stall = 0.1):
+    # read frames as a window would, but every tenth frame takes stall
+    #  seconds. In one process those frames would hold up the game
+    frames = SharedFrames()
+    context = multiprocessing.get_context('spawn')
+    worker = context.Process(target = run_worker,
+                             args = (frames.name, (1024, 768), 1))
+    worker.start()
+    renderer = Renderer()
+    while frames.read(renderer, 1.0 / 60) == None:
+        time.sleep(0.01)
+    frames.send_input(ACTION.start, True)
+    first = frames.read(renderer, 1.0 / 60)[1]['tick']
+    start = clock()
+    count = 0
+    while clock() - start < seconds:
+        frames.read(renderer, 1.0 / 60)
+        count += 1
+        if count % 10 == 0:
+            time.sleep(stall)
+        else:
+            time.sleep(1.0 / 60)
+    ticks = frames.read(renderer, 1.0 / 60)[1]['tick'] - first
+    elapsed = clock() - start
+    frames.stop()
+    worker.join()
+    frames.close()
+    print('')
+    print('window stalls %.0f ms every 10 frames: %d frames drawn, '
+          'worker ran %.1f ticks/s, %d reads retried' %
+          (stall * 1000, count, ticks / elapsed, frames.retries))
+
+def main():
+    frame_costs()
+    stalls()
+
+if __name__ == '__main__':
+    main()
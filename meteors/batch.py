@@ -0,0 +1,166 @@
+import copy
+import random
+import multiprocessing
+
+from enums import *
+from simulation import *
+from tracing import *
+
+# Input policies play the game in place of the keyboard. Before every tick
+# act(sim) is called, and sends whatever inputs it likes with
+# sim.on_action(). Each game gets its own copy of the policy, made with
+# reset(seed), so policies can keep state and have their own RNG, which
+# must not be the random module, that's the game's.
+
+class IdlePolicy():
+    # sits still and lets the meteors come to it
+    def reset(self, seed):
+        return IdlePolicy()
+
+    def act(self, sim):
+        pass
+
+
+class SpinPolicy():
+    # turns on the spot and fires every few ticks
+    def __init__(self, fire_every = 10):
+        self.fire_every = fire_every
+
+    def reset(self, seed):
+        return SpinPolicy(self.fire_every)
+
+    def act(self, sim):
+        if sim.tick % self.fire_every == 0:
+            sim.on_action(ACTION.left, True)
+            sim.on_action(ACTION.fire, True)
+
+
+class RandomPolicy():
+    # presses and releases random keys, mostly fire
+    def __init__(self, rate = 0.2, seed = None):
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.held = set()
+
+    def reset(self, seed):
+        return RandomPolicy(self.rate, seed)
+
+    def act(self, sim):
+        if self.rng.random() < self.rate:
+            action = self.rng.choice([ACTION.left, ACTION.right, ACTION.forward] +
+                                     [ACTION.fire] * 6)
+            press = action not in self.held
+            if press:
+                self.held.add(action)
+            else:
+                self.held.remove(action)
+            sim.on_action(action, press)
+
+
+class GameSpec():
+    # everything needed to run one game
+    def __init__(self, seed, policy, level = 1, max_ticks = 60 * 60,
+                 size = (1024, 768), step = 1.0 / 60):
+        self.seed = seed
+        self.policy = policy
+        # level to start on
+        self.level = level
+        # give up after this many ticks, even if the ship is still alive
+        self.max_ticks = max_ticks
+        self.size = size
+        self.step = step
+
+
+def run_game(spec):
+    # Play one game from the start of spec.level until the ship dies or time
+    #  runs out. Returns a dict of results.
+    sim = Simulation(spec.size, spec.seed)
+    tracer = Tracer(1024)
+    tracer.enable()
+    sim.set_tracer(tracer)
+    policy = spec.policy.reset(spec.seed)
+
+    # add_meteor1() uses the level for the number of meteors
+    sim.level = spec.level
+    sim.on_action(ACTION.start, True)
+    score = sim.score
+    level = sim.level
+    start = clock()
+    while sim.tick < spec.max_ticks:
+        if sim.state == STATE.level:
+            sim.on_action(ACTION.start, True)
+        else:
+            policy.act(sim)
+        sim.update(spec.step)
+        # game over resets the score and level, so keep what they were
+        if sim.state == STATE.game_over:
+            break
+        score = sim.score
+        level = sim.level
+    elapsed = clock() - start
+
+    phases = dict()
+    for (name, (calls, total)) in tracer.totals().items():
+        phases[name] = total
+    return {'seed': spec.seed,
+            'policy': spec.policy.__class__.__name__,
+            'start_level': spec.level,
+            'level': level,
+            'score': score,
+            'ticks': sim.tick,
+            'died': sim.state == STATE.game_over,
+            'time': elapsed,
+            'phases': phases}
+
+
+class Batch():
+    # Runs many independent games across a pool of worker processes.
+    # Games are handed out in chunks, so the cost of sending specs and
+    # results between processes is spread over several games, and results
+    # come back as each chunk finishes rather than when the whole batch is
+    # done.
+    def __init__(self, workers = None, chunksize = None):
+        if workers == None:
+            workers = multiprocessing.cpu_count()
+        self.workers = workers
+        # games per chunk, None picks one from the batch size
+        self.chunksize = chunksize
+        # throughput of the last run()
+        self.games = 0
+        self.ticks = 0
+        self.elapsed = 0.0
+
+    def run(self, specs):
+        # yields the result of every game, in the order they finish
+        specs = list(specs)
+        chunksize = self.chunksize
+        if chunksize == None:
+            # a few chunks per worker, so a slow chunk doesn't hold up the end
+            chunksize = max(1, len(specs) // (self.workers * 4))
+        self.games = 0
+        self.ticks = 0
+        start = clock()
+        if self.workers == 1:
+            results = map(run_game, specs)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(self.workers)
+            results = pool.imap_unordered(run_game, specs, chunksize)
+        try:
+            for result in results:
+                self.games += 1
+                self.ticks += result['ticks']
+                self.elapsed = clock() - start
+                yield result
+        finally:
+            if pool != None:
+                pool.terminate()
+                pool.join()
+
+    def games_per_second(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.games / self.elapsed
+
+    def games_per_second_per_core(self):
+        return self.games_per_second() / self.workers
@@ -0,0 +1,92 @@
+import math
+
+class SpatialHash():
+    # Uniform grid broad phase for collision detection.
+    # Objects are put in every cell that their bounding circle overlaps, and only
+    # objects which share a cell are reported as candidate pairs, so the narrow
+    # phase (Collider.collide) no longer has to look at every pair of objects.
+    # The grid wraps around at the world edges. Meteors are allowed to drift off
+    # one edge before they teleport to the opposite one, and the ship wraps with
+    # a modulo, so an object hanging off the right edge shares cells with objects
+    # at the left edge.
+    def __init__(self, cell_size = 100):
+        # cell_size is a hint, it is adjusted so a whole number of cells fits
+        # the world exactly and wrapped cells line up
+        self.cell_size = cell_size
+        self.cells = dict()
+        self.set_world_size(cell_size, cell_size)
+
+    def set_world_size(self, winx, winy):
+        self.cols = max(1, int(round(float(winx) / self.cell_size)))
+        self.rows = max(1, int(round(float(winy) / self.cell_size)))
+        self.cell_x = float(winx) / self.cols
+        self.cell_y = float(winy) / self.rows
+
+    def clear(self):
+        self.cells = dict()
+
+    def insert(self, item):
+        # add an object to every cell its bounding circle touches
+        cells = self.cells
+        for key in self._keys(item.get_bounds()):
+            if key in cells:
+                cells[key].append(item)
+            else:
+                cells[key] = [item]
+
+    def rebuild(self, items, winx, winy):
+        # clear the grid and insert all items, call once per tick
+        if winx != self.cols * self.cell_x or winy != self.rows * self.cell_y:
+            self.set_world_size(winx, winy)
+        self.clear()
+        for item in items:
+            if not item.remove:
+                self.insert(item)
+
+    def pairs(self):
+        # yields each unordered pair of objects that share at least one cell, once
+        seen = set()
+        for bucket in self.cells.values():
+            n = len(bucket)
+            for i in range(n - 1):
+                item1 = bucket[i]
+                id1 = id(item1)
+                for j in range(i + 1, n):
+                    item2 = bucket[j]
+                    id2 = id(item2)
+                    if id1 < id2:
+                        key = (id1, id2)
+                    else:
+                        key = (id2, id1)
+                    if key not in seen:
+                        seen.add(key)
+                        yield (item1, item2)
+
+    def query(self, item):
+        # returns the objects in the grid that share a cell with item, once each.
+        # item itself does not have to be in the grid
+        cells = self.cells
+        seen = set()
+        found = []
+        for key in self._keys(item.get_bounds()):
+            if key in cells:
+                for other in cells[key]:
+                    if id(other) not in seen:
+                        seen.add(id(other))
+                        found.append(other)
+        return found
+
+    def _span(self, low, high, size, count):
+        # wrapped cell indexes covering [low, high] along one axis
+        first = int(math.floor(low / size))
+        last = int(math.floor(high / size))
+        if last - first + 1 >= count:
+            return range(count)
+        return [i % count for i in range(first, last + 1)]
+
+    def _keys(self, bounds):
+        # cells touched by the bounding circle (x, y, radius)
+        (x, y, r) = bounds
+        xs = self._span(x - r, x + r, self.cell_x, self.cols)
+        ys = self._span(y - r, y + r, self.cell_y, self.rows)
+        return [(cx, cy) for cx in xs for cy in ys]
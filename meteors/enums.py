@@ -9,3 +9,7 @@ def enum(*sequential, **named):
 TURN = enum('left', 'right')
 THRUST = enum('forward', 'back')
 STATE = enum('start', 'play', 'game_over', 'level')
+# how the world store moves an object each tick, see Store.step()
+MOTION = enum('custom', 'wrap', 'cull')
+# inputs to the Simulation, see Game.on_key() for the keys
+ACTION = enum('start', 'left', 'right', 'forward', 'back', 'fire')
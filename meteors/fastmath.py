@@ -0,0 +1,19 @@
+import math
+
+from vector import *
+
+# Angles in the game are degrees, 0 is up and they go anticlockwise, so 90 is
+# left. See bench/trig.py for how these compare with the old code, and with
+# lookup tables.
+
+def sin_cos(deg):
+    # (sin, cos) of an angle in degrees, as python floats
+    rad = math.radians(float(deg))
+    return (math.sin(rad), math.cos(rad))
+
+def heading(deg):
+    # unit vector pointing along deg, WObject.deg_to_vel() without the tan,
+    #  the branches and the sqrt. Works for any angle, not just 0 - 360
+    (sin, cos) = sin_cos(deg)
+    return Vector2(-sin, cos)
+
@@ -0,0 +1,135 @@
+import collections
+
+import numpy
+
+from tracing import clock
+
+class LatencyHistogram():
+    # Latencies counted into buckets bucket seconds wide, up to max_latency,
+    # plus one for anything longer. Recording is a few operations and never
+    # allocates, so it can stay on for a whole game.
+    def __init__(self, bucket = 0.0005, max_latency = 0.25):
+        self.bucket = bucket
+        self.counts = numpy.zeros(int(round(max_latency / bucket)) + 1, numpy.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def clear(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        i = min(int(seconds / self.bucket), len(self.counts) - 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        # the top of the bucket the p'th percentile falls in, in seconds.
+        #  The overflow bucket gives max
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(numpy.ceil(p / 100.0 * self.count)))
+        i = int(numpy.searchsorted(numpy.cumsum(self.counts), rank))
+        if i == len(self.counts) - 1:
+            return self.max
+        return min(self.max, (i + 1) * self.bucket)
+
+    def summary(self, percentiles = (50, 90, 99)):
+        # count, mean, max and percentiles, times in ms, as Tracer.summary()
+        stats = {'count': self.count,
+                 'mean': self.total / max(1, self.count) * 1000,
+                 'max': self.max * 1000}
+        for p in percentiles:
+            stats['p%g' % p] = self.percentile(p) * 1000
+        return stats
+
+
+class InputPipeline():
+    # Key presses on their way to the game, and how long they take to show.
+    # Window events arrive whenever pyglet dispatches them, anywhere in a
+    # frame. Rather than change the game there and then, push() timestamps
+    # each one and queues it, and apply() hands the queue over in one go at
+    # a fixed point, the start of the next tick (see Game._step()), just as
+    # a replay does.
+    # Two latencies are kept, from push() to:
+    #   wait   apply(), how long input waits for a tick
+    #   frame  the end of the first frame drawn after a tick that saw it,
+    #          see presented()
+    # frame is as near to input to photon as we can measure from in here:
+    # it leaves out the OS delivering the event, and the buffer swap and
+    # display after drawing.
+    def __init__(self, bucket = 0.0005, max_latency = 0.25):
+        # (time, action, press) waiting for apply()
+        self.queue = []
+        # (sequence number, time) applied but not yet drawn
+        self.in_flight = collections.deque()
+        # inputs applied so far, the next one's sequence number
+        self.applied = 0
+        # inputs apply() couldn't hand over
+        self.dropped = 0
+        self.wait = LatencyHistogram(bucket, max_latency)
+        self.frame = LatencyHistogram(bucket, max_latency)
+
+    def push(self, action, press, when = None):
+        # when is the clock() the event happened, if it's known, otherwise
+        #  now
+        if when == None:
+            when = clock()
+        self.queue.append((when, action, press))
+
+    def apply(self, on_action, now = None):
+        # on_action(action, press) for everything queued, oldest first. If
+        #  on_action returns False the input was dropped
+        if len(self.queue) == 0:
+            return
+        if now == None:
+            now = clock()
+        queue = self.queue
+        self.queue = []
+        for (when, action, press) in queue:
+            if on_action(action, press) == False:
+                self.dropped += 1
+                continue
+            self.wait.record(now - when)
+            self.in_flight.append((self.applied, when))
+            self.applied += 1
+
+    def presented(self, applied = None, now = None):
+        # a frame has been drawn showing the first applied inputs, all that
+        #  have been applied if None. Inputs applied in another process, see
+        #  remote.py, only show once it has published a frame after them
+        if len(self.in_flight) == 0:
+            return
+        if applied == None:
+            applied = self.applied
+        if now == None:
+            now = clock()
+        in_flight = self.in_flight
+        while len(in_flight) > 0 and in_flight[0][0] < applied:
+            (sequence, when) = in_flight.popleft()
+            self.frame.record(now - when)
+
+    def clear(self):
+        self.wait.clear()
+        self.frame.clear()
+        self.dropped = 0
+
+    def format_summary(self, percentiles = (50, 90, 99)):
+        # both histograms as a table, as Tracer.format_summary()
+        columns = ['p%g' % p for p in percentiles] + ['mean', 'max']
+        lines = ['%-36s %8s' % ('input latency (ms)', 'count') +
+                 ''.join(['%9s' % c for c in columns])]
+        for (name, histogram) in [('input/wait', self.wait),
+                                  ('input/frame', self.frame)]:
+            stats = histogram.summary(percentiles)
+            lines.append('%-36s %8d' % (name, stats['count']) +
+                         ''.join(['%9.3f' % stats[c] for c in columns]))
+        if self.dropped > 0:
+            lines.append('%d inputs dropped' % self.dropped)
+        return '\n'.join(lines)
@@ -1,37 +1,90 @@
 #!/usr/bin/python
 
-import random
-import math
+import os
+import multiprocessing
 
 import pyglet
-from pyglet.gl import *
-from pyglet.window import key
+# the worker process imports this file too, and doesn't draw, see remote.py
+if multiprocessing.parent_process() != None:
+    pyglet.options['shadow_window'] = False
 
-from vector import *
-from world import *
-from enums import *
-from objects import *
-from game import *
+from game import Game
+from tracing import Tracer
+from replay import Recording
 
-window = pyglet.window.Window(fullscreen=False)
-window.set_exclusive_mouse()
-game = Game(window)
+def main():
+    window = pyglet.window.Window(fullscreen=False)
+    window.set_exclusive_mouse()
 
-# Event registration
-@window.event
-def on_draw():
-    game.draw()
+    # METEORS_RECORD=game.rep python main.py
+    #  records the game, METEORS_REPLAY=game.rep plays it back
+    record_file = os.environ.get('METEORS_RECORD')
+    replay_file = os.environ.get('METEORS_REPLAY')
+    # METEORS_WORKER=1 python main.py
+    #  runs the game in another process, see remote.py. Not with the above
+    worker = os.environ.get('METEORS_WORKER') and not (record_file or replay_file)
+    if worker:
+        # shared memory and a second process, only when asked for
+        from remote import RemoteGame
+        game = RemoteGame(window)
+    else:
+        game = Game(window)
+    if replay_file:
+        game.play(Recording.load(replay_file))
+    elif record_file:
+        recording = game.record()
 
-@window.event
-def on_key_press(symbol, modifiers):
-    game.on_key(symbol, modifiers, True)
+    # METEORS_SPECTATE=/tmp/meteors.sock python main.py
+    #  streams snapshots of the game to that socket, see snapshot.py. Not
+    #  with METEORS_WORKER
+    spectate_path = os.environ.get('METEORS_SPECTATE')
+    if spectate_path and not worker:
+        game.serve_spectators(spectate_path)
 
-@window.event
-def on_key_release(symbol, modifiers):
-    game.on_key(symbol, modifiers, False)
+    # METEORS_LATENCY=1 python main.py
+    #  prints how long key presses took to show on screen on exit
+    latency = os.environ.get('METEORS_LATENCY')
 
-# Register update method @ 60 fps
-pyglet.clock.schedule_interval(game.update, 1.0/60.0)
+    # METEORS_TRACE=trace.json python main.py
+    #  times each frame and writes a Chrome trace on exit
+    trace_file = os.environ.get('METEORS_TRACE')
+    if trace_file:
+        tracer = Tracer()
+        tracer.enable()
+        game.set_tracer(tracer)
 
-# start the application
-pyglet.app.run()
+    # Event registration
+    @window.event
+    def on_draw():
+        game.draw()
+
+    @window.event
+    def on_key_press(symbol, modifiers):
+        game.on_key(symbol, modifiers, True)
+
+    @window.event
+    def on_key_release(symbol, modifiers):
+        game.on_key(symbol, modifiers, False)
+
+    # Register update method, called 60 times a second. schedule() would call
+    # it as often as the event loop can spin. The game runs at a fixed 60
+    # steps a second whatever the frame rate, see FixedStep
+    pyglet.clock.schedule_interval(game.update, 1 / 60.0)
+
+    # start the application
+    pyglet.app.run()
+
+    if record_file and not replay_file:
+        recording.save(record_file)
+
+    game.close()
+
+    if trace_file:
+        tracer.write_chrome_trace(trace_file)
+        print(tracer.format_summary())
+
+    if latency:
+        print(game.inputs.format_summary())
+
+if __name__ == '__main__':
+    main()
@@ -1,55 +1,57 @@
 import random
 import math
+import inspect
 
-import pyglet
-from pyglet.gl import *
-from pyglet.window import key
+import numpy
 
 from vector import *
 from world import *
 from enums import *
 
+# shapes every ship and bullet share, see world.shared_shape()
+SHAPE_SOURCES['ship'] = [0.5, 1, 1, 0, 
+                         1, 0, 0.5, 0.2, 
+                         0.5, 0.2, 0, 0, 
+                         0, 0, 0.5, 1]
+SHAPE_SOURCES['bullet'] = [0, 0, 0.5, 1, 0.5, 1, 1, 0, 1, 0, 0, 0]
+
 class Meteor(WObject):
     # Meteor bass class
+    motion = MOTION.wrap
+
     def __init__(self, start_pos, start_deg, num_points, size, speed, max_health):
         WObject.__init__(self)
-        self.init_pos(start_pos)
-        self.vel = self.deg_to_vel(start_deg) * speed
-        self.size = Vector2(size, size)
         self.num_points = num_points
-        self.points = self.generate_points()
+        self.meteor_size = size
+        self.speed = speed
+        self.max_health = max_health
+        self.reset(start_pos, start_deg)
+
+    def reset(self, start_pos, start_deg):
+        # (re)start as a new meteor, see pool.Pool. Uses the random module in
+        #  the same order whether it's a new object or a reused one
+        self.remove = False
+        self.init_pos(start_pos)
+        self.init_deg(0)
+        self.vel = self.deg_to_vel(start_deg) * self.speed
+        self.size = Vector2(self.meteor_size, self.meteor_size)
+        self.set_point_array(self.generate_point_array())
         self.turn_speed = random.uniform(-20, 20)
 
-        self.max_health = max_health
         self.health = self.max_health
+        self.update_color()
 
-        self.draw_circle = False
-
-    def bounding_circle(self):
-        return BoundingCircle(self.pos, self.size.x / 2)
+    def get_bounds(self):
+        (x, y) = self.store.pos[self.slot].tolist()
+        return (x, y, float(self.store.size[self.slot, 0]) / 2)
 
     def hit(self):
         self.health = self.health - 1
+        self.update_color()
         if self.health == 0:
             self.remove = True
 
-    def generate_points(self):
-        interval = 360 / self.num_points
-        points = []
-        first = None
-        for i in range(self.num_points):
-            deg = i * interval
-            length = random.uniform(0.7, 1) / 2
-            p = self.deg_to_vel(deg) * length + Vector2(0.5, 0.5)
-            points.append(p)
-            if i == 0:
-                first = p
-            else:
-                points.append(p)
-        points.append(first)
-        return points
-
-    def update(self, time, window):
+    def update_color(self):
         # update color (white -> yellow -> red)
         # bias to make 1 health completely red and full health completely white
         # max_health must be greater than 1
@@ -58,25 +60,135 @@ class Meteor(WObject):
             self.color = [1, 1, (h - 0.5) / 0.5]
         else: # approach red
             self.color = [1, h / 0.5, 0]
-       
+
+    def generate_point_array(self):
+        # a random shape, num_points at random distances around a circle,
+        #  joined up as pairs of points for GL_LINES. When reset() reuses a
+        #  meteor its array is filled in again rather than a new one made
+        directions = self._directions()
+        n = self.num_points
+        points = getattr(self, '_point_array', None)
+        if points is None or points.shape != (2 * n, 2) or not points.flags.writeable:
+            points = numpy.empty((2 * n, 2))
+        for i in range(n):
+            length = random.uniform(0.7, 1) / 2
+            (dx, dy) = directions[i]
+            x = dx * length + 0.5
+            y = dy * length + 0.5
+            if i == 0:
+                points[0] = (x, y)
+                points[2 * n - 1] = (x, y)
+            else:
+                points[2 * i - 1] = (x, y)
+                points[2 * i] = (x, y)
+        return points
+
+    def set_point_array(self, point_array):
+        WObject.set_point_array(self, point_array)
+        # made from the shape when they're first asked for
+        self._lod_arrays = dict()
+        self._hull = None
+
+    # every lod_steps[lod]'th point of the shape, see get_lod_points()
+    lod_steps = [1, 2, 3]
+    lods = len(lod_steps)
+
+    def get_lod_points(self, lod):
+        # fewer points round the same outline, never less than 4
+        if lod == 0:
+            return self._point_array
+        if lod in self._lod_arrays:
+            return self._lod_arrays[lod]
+        # the shape is a ring of points as GL_LINES pairs, see
+        #  generate_point_array()
+        ring = self._point_array[0::2]
+        step = self.lod_steps[lod]
+        while step > 1 and len(ring[::step]) < 4:
+            step -= 1
+        ring = ring[::step]
+        points = numpy.empty((2 * len(ring), 2))
+        points[0::2] = ring
+        points[1::2] = numpy.roll(ring, -1, 0)
+        self._lod_arrays[lod] = points
+        return points
+
+    # directions of the sides of get_hull(), on the axes and diagonals
+    HULL_AXES = numpy.array([[1, 0], [-1, 0], [0, 1], [0, -1],
+                             [1, 1], [-1, -1], [1, -1], [-1, 1]], numpy.float64)
+
+    def get_hull(self):
+        # A coarse outline for early outs in collision detection: an octagon
+        #  around the shape, as how far it reaches along each of HULL_AXES,
+        #  in shape units from the anchor. Nothing on the shape is outside it,
+        #  so a line wholly outside one of its sides can't cross the shape
+        if self._hull is None:
+            points = self._point_array - (self.anchor.x, self.anchor.y)
+            self._hull = numpy.dot(points, Meteor.HULL_AXES.T).max(0)
+        return self._hull
+
+    # num_points -> the direction of each point, shared by all meteors
+    _direction_cache = dict()
+
+    def _directions(self):
+        n = self.num_points
+        if not n in Meteor._direction_cache:
+            interval = 360 / n
+            directions = []
+            for i in range(n):
+                v = self.deg_to_vel(i * interval)
+                directions.append((v.x, v.y))
+            Meteor._direction_cache[n] = directions
+        return Meteor._direction_cache[n]
+
+    def update(self, time, world_size):
+        # the world store does this for all meteors at once, see Store.step()
         # rotate
         self.update_deg(self.deg + self.turn_speed * time)
 
         # update position
         # allow to dissappear off edge, but jump to the opposite edge once that happens
-        pos = self.pos + self.vel * time
-        (winx, winy) = window.get_size()
-        if pos.x < 0 - self.size.x / 2:
-            pos.x = pos.x + (1.5 * self.size.x + winx)
-        if pos.x > winx + self.size.x:
-            pos.x = pos.x - (1.5 * self.size.x + winx)
-        if pos.y < 0 - self.size.y:
-            pos.y = pos.y + (1.5 * self.size.y + winy)
-        if pos.y > winy + self.size.y:
-            pos.y = pos.y - (1.5 * self.size.y + winy)
+        pos = self.pos.add_scaled(self.vel, time)
+        size = self.size
+        (winx, winy) = world_size
+        if pos.x < 0 - size.x / 2:
+            pos.x = pos.x + (1.5 * size.x + winx)
+        if pos.x > winx + size.x:
+            pos.x = pos.x - (1.5 * size.x + winx)
+        if pos.y < 0 - size.y:
+            pos.y = pos.y + (1.5 * size.y + winy)
+        if pos.y > winy + size.y:
+            pos.y = pos.y - (1.5 * size.y + winy)
         self.update_pos(pos)
 
 
+def hull_overlaps(meteors, starts, ends, margin = 1.0):
+    # For each meteor and line from starts[i] to ends[i], false if the line
+    #  is wholly outside one of the sides of the meteor's hull, see
+    #  Meteor.get_hull(), so it can't cross the meteor. margin, in world
+    #  units, keeps lines that only just miss the hull for the edge tests,
+    #  which allow a little slack
+    # all in one store, the world's
+    store = meteors[0].store
+    slots = [meteor.slot for meteor in meteors]
+    pos = store.pos[slots]
+    deg = store.deg[slots]
+    size = store.size[slots]
+    hulls = numpy.array([meteor.get_hull() for meteor in meteors])
+    rad = numpy.radians(deg)
+    cos = numpy.cos(rad)
+    sin = numpy.sin(rad)
+    def project(points):
+        # into shape units, then along each hull axis
+        d = numpy.asarray(points) - pos
+        u = (d[:, 0] * cos + d[:, 1] * sin) / size[:, 0]
+        v = (d[:, 1] * cos - d[:, 0] * sin) / size[:, 1]
+        return numpy.dot(numpy.stack([u, v], 1), Meteor.HULL_AXES.T)
+    # the diagonal axes are sqrt(2) long
+    limit = hulls + 2 * margin / size.min(1)[:, None]
+    outside = (project(starts) > limit) & (project(ends) > limit)
+    return ~outside.any(1)
+
+
 class Meteor1(Meteor):
     # big meteor
     def __init__(self, start_pos, start_deg):
@@ -97,19 +209,28 @@ class Meteor3(Meteor):
 
 class Bullet(WObject):
     # gun projectile
+    motion = MOTION.cull
+
     def __init__(self, start_pos, start_deg):
         WObject.__init__(self)
+        self.size = Vector2(5, 9)
+        self.set_point_array(shared_shape('bullet'))
+        self.reset(start_pos, start_deg)
+
+    def reset(self, start_pos, start_deg):
+        # (re)start as a new bullet, see pool.Pool
+        self.remove = False
         self.init_pos(start_pos)
         self.vel = self.deg_to_vel(start_deg) * 500
         self.init_deg(start_deg)
-        self.size = Vector2(5, 9)
-        self.points = self.to_points([0, 0, 0.5, 1, 0.5, 1, 1, 0, 1, 0, 0, 0])
 
-    def update(self, time, window):
+    def update(self, time, world_size):
+        # the world store does this for all bullets at once, see Store.step()
         # update position and flag for removal if off screen
-        self.update_pos(self.pos + self.vel * time)
-        (winx, winy) = window.get_size()
-        if self.pos.x < 0 or self.pos.x > winx or self.pos.y < 0 or self.pos.y > winy:
+        pos = self.pos.add_scaled(self.vel, time)
+        self.update_pos(pos)
+        (winx, winy) = world_size
+        if pos.x < 0 or pos.x > winx or pos.y < 0 or pos.y > winy:
             self.remove = True
 
     def hit(self):
@@ -129,10 +250,7 @@ class Ship(WObject):
         self.turn_state = None
         self.thrust_state = None
 
-        self.points = self.to_points([0.5, 1, 1, 0, 
-                                      1, 0, 0.5, 0.2, 
-                                      0.5, 0.2, 0, 0, 
-                                      0, 0, 0.5, 1])
+        self.set_point_array(shared_shape('ship'))
 
     def hit(self):
         self.remove = True
@@ -149,14 +267,16 @@ class Ship(WObject):
         else:
             self.thrust_state = None
 
-    def update(self, time, window):
+    def update(self, time, world_size):
         # update velocity
+        vel = self.vel
         if self.thrust_state:
-            added_vel = self.deg_to_vel(self.deg) * self.accel * time
+            heading = self.deg_to_vel(self.deg)
             if self.thrust_state == THRUST.forward:
-                self.vel = self.vel + added_vel
+                vel.add_scaled(heading, self.accel * time)
             elif self.thrust_state == THRUST.back:
-                self.vel = self.vel - added_vel
+                vel.add_scaled(heading, -self.accel * time)
+            self.vel = vel
 
         # update angle
         if self.turn_state:
@@ -167,32 +287,63 @@ class Ship(WObject):
             self.update_deg(self.deg % 360)
        
         # update position based on velocity and keep within window
-        pos = self.pos + self.vel * time
-        (winx, winy) = window.get_size()
-        pos.x = pos.x % winx
-        pos.y = pos.y % winy
+        pos = self.pos.add_scaled(vel, time)
+        (winx, winy) = world_size
+        pos.set(pos.x % winx, pos.y % winy)
         self.update_pos(pos)
 
 
 class Collider():
     # Helper class to aid with collision detection.
     # Register collision detection and handling methods for particular pairs of
-    # objects (by class name), and you can then just call Collider.collide(obj1, obj2),
+    # classes, and you can then just call Collider.collide(obj1, obj2),
     # and Collider.handle(obj1, obj2) and this class will call the appropriate methods.
+    # Methods registered for a base class also cover its subclasses, so one
+    # registration against Meteor handles Meteor1, Meteor2 and Meteor3.
     def __init__(self):
+        # methods as registered, keyed by (class1, class2)
         self.method_dict = dict()
-
-    def register_methods(self, detector, handler, type1, type2):
+        # compiled dispatch table, keyed by the (class1, class2) of actual objects.
+        # values are [detector, handler, swap, batch_detector] or None if
+        #  there's nothing registered
+        self.dispatch = dict()
+        # a tracing.Tracer to time every detector and handler call, or None
+        self.tracer = None
+
+    def register_methods(self, detector, handler, type1, type2, batch_detector = None):
         # Pass in a collision detection method, a collision handling method,
-        #  and two object class names as strings.
+        #  and two object classes.
         # The methods are expected to accept two arguments (the two objects)
         #  in the order which their types are submitted. Will raise an error if you register
-        #  a method for the same pair of objects
-        if self._find_methods(type1, type2) != None or self._find_methods(type2, type1) != None:
-            raise('Already registered methods for ' + type1 + ' and ' + type2)
-        if not type1 in self.method_dict:
-            self.method_dict[type1] = dict()
-        self.method_dict[type1][type2] = [detector, handler]
+        #  a method for the same pair of classes
+        # Optionally, pass a batch detector too. It is given two lists of
+        #  objects, and returns a sequence of bools, one per pair, saying
+        #  whether objs1[i] and objs2[i] collide. collide_all() uses it to
+        #  detect all the pairs of these classes in one call.
+        if (type1, type2) in self.method_dict or (type2, type1) in self.method_dict:
+            raise ValueError('Already registered methods for %s and %s' % 
+                             (type1.__name__, type2.__name__))
+        self.method_dict[(type1, type2)] = [detector, handler, batch_detector]
+        # registering can change what an existing class pair resolves to
+        self.dispatch = dict()
+
+    def set_tracer(self, tracer):
+        # With a tracer, the methods are wrapped in spans as they are compiled
+        #  into the dispatch table. Without one they are called directly, so
+        #  tracing costs nothing unless it's set up.
+        self.tracer = tracer
+        self.dispatch = dict()
+
+    def find_methods(self, type1, type2):
+        # returns [detector, handler, swap, batch_detector] for objects of these
+        #  two classes, or None if they never collide. If swap is true the
+        #  methods expect the objects the other way around.
+        key = (type1, type2)
+        if key in self.dispatch:
+            return self.dispatch[key]
+        methods = self._compile(type1, type2)
+        self.dispatch[key] = methods
+        return methods
 
     def collide(self, obj1, obj2):
         # Pass it any two world objects (in any order) and it will call the appropriate
@@ -200,18 +351,42 @@ class Collider():
         # If there is no method registered for that pair, it will return false.
         if obj1.remove or obj2.remove:
             return False
-        type1 = self._type(obj1)
-        type2 = self._type(obj2)
-        methods1 = self._find_methods(type1, type2)
-        methods2 = self._find_methods(type2, type1)
-        if methods1 == None and methods2 == None:
+        methods = self.find_methods(obj1.__class__, obj2.__class__)
+        if methods == None:
             return False
-        # only one of these will do something
-        if methods1 != None:
-            return methods1[0](obj1, obj2)
-        elif methods2 != None:
-            return methods2[0](obj2, obj1)
-        return False
+        if methods[2]:
+            return methods[0](obj2, obj1)
+        return methods[0](obj1, obj2)
+
+    def collide_all(self, pairs):
+        # collide() for a list of (obj1, obj2) pairs, returns a list of bools.
+        # Pairs with a batch detector are grouped and detected together, the
+        #  rest one at a time.
+        hits = [False] * len(pairs)
+        # batch detector -> ([index], [obj1], [obj2])
+        groups = dict()
+        for i in range(len(pairs)):
+            (obj1, obj2) = pairs[i]
+            if obj1.remove or obj2.remove:
+                continue
+            methods = self.find_methods(obj1.__class__, obj2.__class__)
+            if methods == None:
+                continue
+            if methods[2]:
+                (obj1, obj2) = (obj2, obj1)
+            if methods[3] == None:
+                hits[i] = methods[0](obj1, obj2)
+            else:
+                if not methods[3] in groups:
+                    groups[methods[3]] = ([], [], [])
+                group = groups[methods[3]]
+                group[0].append(i)
+                group[1].append(obj1)
+                group[2].append(obj2)
+        for (batch_detector, (indexes, objs1, objs2)) in groups.items():
+            for (i, hit) in zip(indexes, batch_detector(objs1, objs2)):
+                hits[i] = bool(hit)
+        return hits
 
     def handle(self, obj1, obj2):
         # Pass it any two world objects (in any order) and it will call the appropriate
@@ -219,23 +394,30 @@ class Collider():
         # If there is no method registered for that pair, it will do nothing.
         if obj1.remove or obj2.remove:
             return
-        type1 = self._type(obj1)
-        type2 = self._type(obj2)
-        methods1 = self._find_methods(type1, type2)
-        methods2 = self._find_methods(type2, type1)
-        if methods1 == None and methods2 == None:
+        methods = self.find_methods(obj1.__class__, obj2.__class__)
+        if methods == None:
             return
-        # only one of these will do something
-        if methods1 != None:
-            methods1[1](obj1, obj2)
-        elif methods2 != None:
-            methods2[1](obj2, obj1)
-
-    def _find_methods(self, type1, type2):
-        if type1 in self.method_dict:
-            if type2 in self.method_dict[type1]:
-                return self.method_dict[type1][type2]
+        if methods[2]:
+            methods[1](obj2, obj1)
+        else:
+            methods[1](obj1, obj2)
+
+    def _compile(self, type1, type2):
+        # search both class hierarchies, most derived classes first
+        for base1 in inspect.getmro(type1):
+            for base2 in inspect.getmro(type2):
+                if (base1, base2) in self.method_dict:
+                    return self._traced(self.method_dict[(base1, base2)], False)
+                if (base2, base1) in self.method_dict:
+                    return self._traced(self.method_dict[(base2, base1)], True)
         return None
 
-    def _type(self, obj):
-        return obj.__class__.__name__
+    def _traced(self, methods, swap):
+        (detector, handler, batch_detector) = methods
+        if self.tracer != None:
+            detector = self.tracer.wrap('collide/' + detector.__name__, detector)
+            handler = self.tracer.wrap('handle/' + handler.__name__, handler)
+            if batch_detector != None:
+                batch_detector = self.tracer.wrap('collide/' + batch_detector.__name__,
+                                                  batch_detector)
+        return [detector, handler, swap, batch_detector]
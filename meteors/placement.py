@@ -0,0 +1,102 @@
+import math
+import random
+
+from vector import *
+
+class Scatter():
+    # Random positions in the world, at least min_dist from each other and
+    # from any points to avoid, by rejection sampling with a bounded number
+    # of tries.
+    # Placed points go in a grid of min_dist cells, so a candidate is only
+    # checked against the 3x3 cells around it, not every point so far. Each
+    # point gets at most max_attempts candidates: if none of them fit, the
+    # one furthest from its nearest neighbour is used, so count points always
+    # take at most count * max_attempts tries, even when they can't all fit.
+    # Candidates are drawn and accepted exactly as a plain rejection loop
+    # would, so while there's room the points are the same.
+    def __init__(self, winx, winy, min_dist, max_attempts = 50):
+        self.winx = winx
+        self.winy = winy
+        self.min_dist = float(min_dist)
+        self.min_dist2 = self.min_dist * self.min_dist
+        self.max_attempts = max_attempts
+        self.cells = dict()
+        # candidates drawn, and points placed too close because nothing fitted
+        self.attempts = 0
+        self.fallbacks = 0
+
+    def avoid(self, pos):
+        # keep placed points away from pos too
+        self._insert(pos.x, pos.y)
+
+    def place(self):
+        # returns a new point as a Vector2
+        best = None
+        best_dist2 = -1.0
+        for i in range(self.max_attempts):
+            x = random.uniform(0, self.winx)
+            y = random.uniform(0, self.winy)
+            self.attempts += 1
+            dist2 = self._nearest2(x, y)
+            if dist2 >= self.min_dist2:
+                self._insert(x, y)
+                return Vector2(x, y)
+            if dist2 > best_dist2:
+                best = (x, y)
+                best_dist2 = dist2
+        self.fallbacks += 1
+        (x, y) = best
+        self._insert(x, y)
+        return Vector2(x, y)
+
+    def _key(self, x, y):
+        return (int(math.floor(x / self.min_dist)), int(math.floor(y / self.min_dist)))
+
+    def _insert(self, x, y):
+        key = self._key(x, y)
+        if key in self.cells:
+            self.cells[key].append((x, y))
+        else:
+            self.cells[key] = [(x, y)]
+
+    def _nearest2(self, x, y):
+        # squared distance to the nearest point in the 3x3 cells round (x, y).
+        # Anything further out is more than min_dist away
+        (cx, cy) = self._key(x, y)
+        cells = self.cells
+        nearest = float('inf')
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                if (i, j) in cells:
+                    for (px, py) in cells[(i, j)]:
+                        dx = px - x
+                        dy = py - y
+                        d = dx * dx + dy * dy
+                        if d < nearest:
+                            nearest = d
+        return nearest
+
+
+def spread_angles(count, min_separation, max_attempts = 50):
+    # yields count random angles in degrees, at least min_separation apart.
+    #  Like Scatter, a bounded number of tries per angle, then the candidate
+    #  furthest from the others. A generator, so whatever the caller does
+    #  with the random module between angles happens in the same order as
+    #  in a plain loop
+    degs = []
+    for n in range(count):
+        best = None
+        best_sep = -1.0
+        for i in range(max_attempts):
+            deg = random.uniform(0, 360)
+            sep = float('inf')
+            for last_deg in degs:
+                sep = min(sep, abs(deg - last_deg))
+            if sep >= min_separation:
+                best = deg
+                break
+            if sep > best_sep:
+                best = deg
+                best_sep = sep
+        degs.append(best)
+        yield best
@@ -0,0 +1,62 @@
+import random
+
+class Pool():
+    # Typed pool of reusable game objects.
+    # Making a WObject is expensive: a private Store, the shape, the
+    # transform caches. Objects which come and go all the time (bullets,
+    # meteors) are instead taken from a pool with acquire(), which calls
+    # reset() on a free object with the constructor's arguments, and given
+    # back with release() once they've left the world. cls must have a
+    # reset(*args) which leaves the object as cls(*args) would.
+    def __init__(self, cls, *warm_args):
+        self.cls = cls
+        # constructor arguments for objects made by warm()
+        self.warm_args = warm_args
+        self.free = []
+        # acquires from the free list, and ones that had to make an object
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        # most objects ever in use at once
+        self.high_water = 0
+
+    def acquire(self, *args):
+        if len(self.free) > 0:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.hits += 1
+        else:
+            obj = self.cls(*args)
+            self.misses += 1
+        obj.pool = self
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        # obj must be out of the world, see Simulation.remove_item()
+        if obj.pool is not self:
+            raise ValueError('%s was not acquired from this pool' % obj.__class__.__name__)
+        obj.pool = None
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def warm(self, count):
+        # make sure there are at least count free objects. Making objects can
+        #  use the random module (meteor shapes), so its state is put back
+        #  afterwards: warming up doesn't change the game a seed gives
+        if len(self.free) >= count:
+            return
+        state = random.getstate()
+        while len(self.free) < count:
+            obj = self.cls(*self.warm_args)
+            self.free.append(obj)
+        random.setstate(state)
+
+    def stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'in_use': self.in_use,
+                'free': len(self.free),
+                'high_water': self.high_water}
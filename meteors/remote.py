@@ -0,0 +1,319 @@
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy
+
+# the worker doesn't draw, don't make a GL context in it
+import pyglet
+pyglet.options['shadow_window'] = False
+
+from enums import *
+from simulation import *
+from render import *
+from game import *
+
+# The Simulation in a worker process, drawn by the window process.
+# The worker runs the game at its fixed step in real time, and after each
+# frame of steps publishes the state of the world into shared memory. The
+# window process never runs the Simulation, it reads the latest frame and
+# draws it, so a slow tick doesn't hold up drawing or input, and a slow draw
+# doesn't hold up the game. Key presses go the other way through a ring in
+# the same block.
+
+# control words: worker keeps running while set, input ring read and write
+#  counts, index of the frame buffer last published
+CONTROL = ['running', 'input_read', 'input_write', 'latest']
+(C_RUNNING, C_READ, C_WRITE, C_LATEST) = range(len(CONTROL))
+# per frame ints: seqlock count (odd while being written), tick, slots and
+#  vertices in use, layout version, HUD state, inputs the worker had
+#  applied when it ran the frame's ticks
+FRAME_INTS = ['seq', 'tick', 'slots', 'vertices', 'layout', 'score', 'level', 'state',
+              'inputs']
+(F_SEQ, F_TICK, F_SLOTS, F_VERTICES, F_LAYOUT, F_SCORE, F_LEVEL, F_STATE,
+ F_INPUTS) = range(len(FRAME_INTS))
+# per frame floats: clock() when published, world size
+FRAME_FLOATS = ['time', 'winx', 'winy']
+
+class SharedFrames():
+    # Double buffered frames of the game in one multiprocessing.shared_memory
+    # block, plus a ring of key presses.
+    # There's one writer, the worker, and one reader, the window. The writer
+    # fills the buffer that wasn't published last, then publishes it, so the
+    # reader always has a whole frame to look at. Each buffer has a seqlock:
+    # the reader checks the count is even and the same after it has finished
+    # with the buffer, and if the writer got round to it meanwhile, tries
+    # again. The input ring has one writer too, so neither side ever waits
+    # on a lock.
+    # A frame is the state of every store slot, pos and deg now and at the
+    # start of the last tick so the reader can interpolate, plus the
+    # Renderer layout. The layout only changes when objects come and go, so
+    # it's only written then.
+    def __init__(self, max_slots = 4096, max_vertices = 65536, inputs = 256,
+                 name = None):
+        self.max_slots = max_slots
+        self.max_vertices = max_vertices
+        self.max_inputs = inputs
+        frame_fields = [
+            ('ints', numpy.int64, (len(FRAME_INTS),)),
+            ('floats', numpy.float64, (len(FRAME_FLOATS),)),
+            ('pos', numpy.float64, (max_slots, 2)),
+            ('prev_pos', numpy.float64, (max_slots, 2)),
+            ('deg', numpy.float64, (max_slots,)),
+            ('prev_deg', numpy.float64, (max_slots,)),
+            ('size', numpy.float64, (max_slots, 2)),
+            ('model', numpy.float64, (max_vertices, 2)),
+            ('slots', numpy.intp, (max_vertices,)),
+            ('colors', numpy.uint8, (max_vertices, 3))]
+        # (frame or None, field, dtype, shape), 8 byte aligned one after another
+        fields = [(None, 'control', numpy.int64, (len(CONTROL),)),
+                  (None, 'inputs', numpy.uint8, (inputs,))]
+        for i in range(2):
+            fields += [(i,) + field for field in frame_fields]
+        offsets = []
+        total = 0
+        for (i, field, dtype, shape) in fields:
+            offsets.append(total)
+            nbytes = numpy.dtype(dtype).itemsize * int(numpy.prod(shape))
+            total += (nbytes + 7) // 8 * 8
+        if name == None:
+            self.shm = shared_memory.SharedMemory(create = True, size = total)
+            self.owner = True
+        else:
+            self.shm = _attach(name)
+            self.owner = False
+        self.name = self.shm.name
+        # the frames are dicts of field -> view
+        self.frames = [dict(), dict()]
+        for ((i, field, dtype, shape), offset) in zip(fields, offsets):
+            view = numpy.ndarray(shape, dtype, self.shm.buf, offset)
+            if i == None:
+                setattr(self, field, view)
+            else:
+                self.frames[i][field] = view
+        if self.owner:
+            self.control[:] = 0
+            self.control[C_RUNNING] = 1
+            self.control[C_LATEST] = -1
+        # writer side: layout version written to each buffer
+        self.layout = 0
+        self.written = [-1, -1]
+        # reader side: layout version the last read() handed out
+        self.read_layout = -1
+        # frames the reader had to read again because the writer caught up
+        self.retries = 0
+
+    def close(self):
+        # the owner also frees the block
+        self.control = None
+        self.inputs = None
+        self.frames = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def running(self):
+        return self.control[C_RUNNING] != 0
+
+    def stop(self):
+        self.control[C_RUNNING] = 0
+
+    # key presses, window -> worker
+
+    def send_input(self, action, press):
+        # returns False if the ring is full and the input was dropped
+        control = self.control
+        write = int(control[C_WRITE])
+        if write - int(control[C_READ]) >= self.max_inputs:
+            return False
+        self.inputs[write % self.max_inputs] = action << 1 | int(bool(press))
+        control[C_WRITE] = write + 1
+        return True
+
+    def receive_inputs(self):
+        # every (action, press) sent since the last call, oldest first
+        control = self.control
+        read = int(control[C_READ])
+        write = int(control[C_WRITE])
+        events = []
+        for i in range(read, write):
+            byte = int(self.inputs[i % self.max_inputs])
+            events.append((byte >> 1, bool(byte & 1)))
+        control[C_READ] = write
+        return events
+
+    # frames, worker -> window
+
+    def publish(self, sim, renderer):
+        # write the state of sim into the spare buffer and make it the latest.
+        #  renderer is only used for its layout, so it needs no GL context
+        if renderer.layout(sim.items, sim.store):
+            self.layout += 1
+        latest = int(self.control[C_LATEST])
+        index = 1 - latest if latest >= 0 else 0
+        frame = self.frames[index]
+        ints = frame['ints']
+        ints[F_SEQ] += 1
+        store = sim.store
+        n = min(store.count, self.max_slots)
+        frame['pos'][:n] = store.pos[:n]
+        frame['prev_pos'][:n] = store.prev_pos[:n]
+        frame['deg'][:n] = store.deg[:n]
+        frame['prev_deg'][:n] = store.prev_deg[:n]
+        frame['size'][:n] = store.size[:n]
+        if self.written[index] != self.layout:
+            # anything past the end of the block isn't drawn
+            keep = renderer.slots < n
+            model = renderer.model[keep][:self.max_vertices]
+            v = len(model)
+            frame['model'][:v] = model
+            frame['slots'][:v] = renderer.slots[keep][:v]
+            frame['colors'][:v] = renderer.colors[keep][:v]
+            ints[F_VERTICES] = v
+            ints[F_LAYOUT] = self.layout
+            self.written[index] = self.layout
+        ints[F_TICK] = sim.tick
+        ints[F_SLOTS] = n
+        ints[F_SCORE] = sim.score
+        ints[F_LEVEL] = sim.level
+        ints[F_STATE] = sim.state
+        ints[F_INPUTS] = self.control[C_READ]
+        (winx, winy) = sim.size
+        frame['floats'][:] = (clock(), winx, winy)
+        ints[F_SEQ] += 1
+        self.control[C_LATEST] = index
+
+    def read(self, renderer, step):
+        # interpolated vertices of the latest frame, laid out as renderer now
+        #  is, and the frame's ints as a dict. None before the first frame
+        while True:
+            index = int(self.control[C_LATEST])
+            if index < 0:
+                return None
+            frame = self.frames[index]
+            ints = frame['ints']
+            seq = int(ints[F_SEQ])
+            if seq % 2 == 1:
+                self.retries += 1
+                continue
+            layout = int(ints[F_LAYOUT])
+            v = int(ints[F_VERTICES])
+            n = int(ints[F_SLOTS])
+            if layout != self.read_layout:
+                # the buffer is written again later, the layout is kept
+                model = frame['model'][:v].copy()
+                slots = frame['slots'][:v].copy()
+                colors = frame['colors'][:v].copy()
+            (published, winx, winy) = frame['floats'].tolist()
+            alpha = min(1.0, max(0.0, (clock() - published) / step))
+            (pos, deg) = interpolate(frame['prev_pos'][:n], frame['pos'][:n],
+                                     frame['prev_deg'][:n], frame['deg'][:n],
+                                     alpha, winx, winy)
+            if layout != self.read_layout:
+                vertices = transform(model, slots, pos, deg, frame['size'])
+            else:
+                vertices = transform(renderer.model, renderer.slots, pos, deg, frame['size'])
+            info = dict(zip(FRAME_INTS, ints.tolist()))
+            if int(ints[F_SEQ]) != seq:
+                self.retries += 1
+                continue
+            if layout != self.read_layout:
+                renderer.set_layout(model, slots, colors)
+                self.read_layout = layout
+            return (vertices, info)
+
+
+def _attach(name):
+    # Attach to a block made by another process. Before python 3.13 that
+    #  also registers it with the resource tracker, to be freed when the
+    #  process exits. The worker shares its parent's tracker, where the
+    #  block is registered already, so that does nothing
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        return shared_memory.SharedMemory(name = name)
+
+
+def run_worker(name, size, seed = None, step = 1.0 / 60, max_slots = 4096,
+               max_vertices = 65536):
+    # the worker process: play the game in real time until stopped
+    frames = SharedFrames(max_slots, max_vertices, name = name)
+    sim = Simulation(size, seed)
+    renderer = Renderer()
+    steps = FixedStep(step)
+    frames.publish(sim, renderer)
+    last = clock()
+    while frames.running():
+        for (action, press) in frames.receive_inputs():
+            sim.on_action(action, press)
+        now = clock()
+        if steps.advance(now - last, sim.update) > 0:
+            frames.publish(sim, renderer)
+        last = now
+        # sleep until the next step is due
+        time.sleep(max(0.0, (1.0 - steps.alpha) * steps.step))
+    frames.close()
+
+
+class RemoteGame(Game):
+    # Game with the Simulation in a worker process, see run_worker().
+    # Drawing and the keyboard work as they do in Game, the rest (recording,
+    # replays, tracing the Simulation) needs the Simulation in this process.
+    def __init__(self, window, seed = None, max_slots = 4096,
+                 max_vertices = 65536):
+        self._init_window(window)
+        self._init_opengl()
+        self.renderer = Renderer()
+        self.player = None
+        self.clock = FixedStep()
+        # key presses are sent straight on, the worker applies them at the
+        #  start of a tick. This only measures their latency
+        self.inputs = InputPipeline()
+        # HUD state of the last frame drawn: tick, score, level, state...
+        self.info = None
+        self.frames = SharedFrames(max_slots, max_vertices)
+        # spawn, a forked copy of a process with a GL context is asking for
+        #  trouble
+        context = multiprocessing.get_context('spawn')
+        self.worker = context.Process(target = run_worker,
+                                      args = (self.frames.name, window.get_size(),
+                                              seed, self.clock.step,
+                                              max_slots, max_vertices))
+        self.worker.daemon = True
+        self.worker.start()
+        self.set_tracer(None)
+
+    def set_tracer(self, tracer):
+        # only drawing can be traced here
+        if tracer == None:
+            tracer = Tracer(0)
+        self.tracer = tracer
+        self.span_draw = self.tracer.name_id('draw')
+
+    def close(self):
+        self.frames.stop()
+        self.worker.join(1.0)
+        if self.worker.is_alive():
+            self.worker.terminate()
+        self.frames.close()
+
+    def on_key(self, symbol, modifiers, press):
+        if symbol == key.A and press:
+            self._toggle_aa()
+        elif symbol in KEY_ACTIONS:
+            self.inputs.push(KEY_ACTIONS[symbol], press)
+            self.inputs.apply(self.frames.send_input)
+
+    def draw(self):
+        start = self.tracer.begin()
+        self.window.clear()
+        frame = self.frames.read(self.renderer, self.clock.step)
+        if frame != None:
+            (vertices, self.info) = frame
+            self.renderer.draw_vertices(vertices)
+            self.inputs.presented(self.info['inputs'])
+        self.tracer.end(self.span_draw, start)
+
+    def update(self, frame_time):
+        # the worker keeps its own time
+        pass
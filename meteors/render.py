@@ -0,0 +1,173 @@
+import numpy
+import pyglet.graphics
+from pyglet.gl import GL_LINES, glLoadIdentity
+
+from world import *
+
+class Renderer():
+    # Retained mode drawing of WObjects.
+    # WObject.draw() sets up a GL transform and sends the shape for every object,
+    # every frame. Instead, the renderer lays out the shapes of all the objects
+    # once, in one array, and keeps them in a single vertex list in a pyglet
+    # Batch. Each frame all the vertices are transformed together with numpy
+    # from the store, copied into the vertex list, and drawn with a fixed
+    # number of GL calls however many objects there are.
+    # The layout is rebuilt when objects are added to or removed from the
+    # store, or when any object changes its points or color.
+    # Past vertex_budget vertices, objects that have them are drawn with
+    # their less detailed shapes (WObject.get_lod_points()), smallest on
+    # screen first, so the cost of a frame levels off however many meteors
+    # there are.
+    # The layout and the vertices can also come from somewhere else, see
+    # set_layout() and draw_vertices(), eg. from a Simulation running in
+    # another process, see remote.py.
+    def __init__(self, vertex_budget = 16384):
+        # None draws everything at full detail
+        self.vertex_budget = vertex_budget
+        self.batch = pyglet.graphics.Batch()
+        self.vertex_list = None
+        # what the layout was built from
+        self.items = None
+        self.version = None
+        # set when the layout has changed since the vertex list was filled
+        self.stale = True
+        # per vertex: shape (centred on the anchor), store slot and color
+        self.model = numpy.zeros((0, 2))
+        self.slots = numpy.zeros(0, numpy.intp)
+        self.colors = numpy.zeros((0, 3), numpy.uint8)
+        # objects with debug drawing turned on, drawn the old way
+        self.debug = []
+
+    def _layout(self, items, store):
+        models = []
+        counts = []
+        slots = []
+        colors = []
+        self.debug = []
+        lods = self._choose_lods(items, store)
+        for item in items:
+            if item.store is not store:
+                continue
+            points = item.get_lod_points(lods.get(id(item), 0))
+            models.append(points - (item.anchor.x, item.anchor.y))
+            counts.append(len(points))
+            slots.append(item.slot)
+            # glColor3f() clamps, so meteors can go a bit below 0 on their
+            #  last hit
+            colors.append([min(255, max(0, int(c * 255))) for c in item.color])
+            if item.has_debug():
+                self.debug.append(item)
+        if len(models) > 0:
+            self.model = numpy.concatenate(models)
+            self.slots = numpy.repeat(numpy.array(slots, numpy.intp), counts)
+            self.colors = numpy.repeat(numpy.array(colors, numpy.uint8), counts, 0)
+        else:
+            self.model = numpy.zeros((0, 2))
+            self.slots = numpy.zeros(0, numpy.intp)
+            self.colors = numpy.zeros((0, 3), numpy.uint8)
+
+        # the vertex list is brought up to date by draw(), so prepare() does
+        # not need a GL context
+        self.stale = True
+        self.items = items
+        self.version = (store.version, WObject.shape_version, len(items))
+
+    def _choose_lods(self, items, store):
+        # id(item) -> level of detail, for those not at full detail. Objects
+        #  lose detail a level at a time, smallest first, until the layout
+        #  fits the budget or there's no detail left to lose
+        total = 0
+        reducible = []
+        for item in items:
+            if item.store is store:
+                total += len(item.get_point_array())
+                if item.lods > 1:
+                    reducible.append(item)
+        lods = dict()
+        if self.vertex_budget == None or total <= self.vertex_budget:
+            return lods
+        reducible.sort(key = lambda item: float(store.size[item.slot, 0] * 
+                                                 store.size[item.slot, 1]))
+        for lod in range(1, max([item.lods for item in reducible] + [1])):
+            for item in reducible:
+                if lod < item.lods:
+                    total -= (len(item.get_lod_points(lod - 1)) - 
+                              len(item.get_lod_points(lod)))
+                    lods[id(item)] = lod
+                    if total <= self.vertex_budget:
+                        return lods
+        return lods
+
+    def _sync(self):
+        # resize the vertex list to the layout and load the colors
+        count = len(self.model)
+        if self.vertex_list == None:
+            self.vertex_list = self.batch.add(count, GL_LINES, None,
+                                              'v2f/stream', 'c3B/dynamic')
+        elif self.vertex_list.get_size() != count:
+            self.vertex_list.resize(count)
+        if count > 0:
+            numpy.ctypeslib.as_array(self.vertex_list.colors)[:] = self.colors.ravel()
+        self.stale = False
+
+    def layout(self, items, store):
+        # lay out if anything has changed, returns true if it did
+        if (self.items is not items or
+                self.version != (store.version, WObject.shape_version, len(items))):
+            self._layout(items, store)
+            return True
+        return False
+
+    def set_layout(self, model, slots, colors):
+        # use this layout instead of one from items, arrays as in __init__()
+        self.model = model
+        self.slots = slots
+        self.colors = colors
+        self.debug = []
+        self.stale = True
+        self.items = None
+        self.version = None
+
+    def prepare(self, items, store, alpha = None, world_size = None):
+        # lay out if anything has changed, then transform every vertex by the
+        #  current state of its object. Returns the n x 2 vertex array.
+        # With alpha, objects are drawn that far between their state at the
+        #  start of the last tick and now, see Store.interpolate()
+        self.layout(items, store)
+        n = store.count
+        if alpha == None:
+            (pos, deg) = (store.pos[:n], store.deg[:n])
+        else:
+            (winx, winy) = world_size
+            (pos, deg) = store.interpolate(alpha, winx, winy)
+        return transform(self.model, self.slots, pos, deg, store.size)
+
+    def draw(self, items, store, alpha = None, world_size = None):
+        self.draw_vertices(self.prepare(items, store, alpha, world_size))
+
+    def draw_vertices(self, vertices):
+        # draw vertices laid out as the current layout
+        if self.stale:
+            self._sync()
+        if len(vertices) > 0:
+            numpy.ctypeslib.as_array(self.vertex_list.vertices)[:] = vertices.ravel()
+        glLoadIdentity()
+        self.batch.draw()
+        for item in self.debug:
+            item.draw_debug()
+
+
+def transform(model, slots, pos, deg, size):
+    # the vertices of a layout: each point of model scaled, rotated and moved
+    #  by the size, deg and pos of its slot
+    rad = numpy.radians(deg)
+    cos = numpy.cos(rad)[slots]
+    sin = numpy.sin(rad)[slots]
+    size = size[slots]
+    pos = pos[slots]
+    x = model[:, 0] * size[:, 0]
+    y = model[:, 1] * size[:, 1]
+    vertices = numpy.empty_like(model)
+    vertices[:, 0] = x * cos - y * sin + pos[:, 0]
+    vertices[:, 1] = x * sin + y * cos + pos[:, 1]
+    return vertices
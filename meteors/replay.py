@@ -0,0 +1,127 @@
+import struct
+
+from simulation import *
+
+# file header: magic, format version, RNG seed, step length, world size,
+#  number of ticks, number of events
+HEADER = struct.Struct('<4sHQdIIII')
+MAGIC = b'MREP'
+VERSION = 1
+
+class Recording():
+    # A game as its RNG seed, world size and the Simulation inputs.
+    # The Simulation runs at a fixed step and all its randomness comes from
+    # the seed, so playing the inputs back on the tick they arrived on gives
+    # the same game again.
+    # On disk each input is a varint count of ticks since the last input,
+    # then one byte for the action and whether it was a press, so a typical
+    # input takes two bytes.
+    def __init__(self, seed, size, step = 1.0 / 60):
+        self.seed = seed
+        self.size = size
+        self.step = step
+        # (tick, action, press) in order
+        self.events = []
+        # length of the game in ticks
+        self.ticks = 0
+
+    def record(self, tick, action, press):
+        self.events.append((tick, action, press))
+
+    def save(self, filename):
+        body = bytearray()
+        last = 0
+        for (tick, action, press) in self.events:
+            _put_varint(body, tick - last)
+            body.append(action << 1 | int(bool(press)))
+            last = tick
+        (winx, winy) = self.size
+        with open(filename, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.step,
+                                winx, winy, self.ticks, len(self.events)))
+            f.write(bytes(body))
+
+    @staticmethod
+    def load(filename):
+        with open(filename, 'rb') as f:
+            data = bytearray(f.read())
+        if len(data) < HEADER.size:
+            raise ValueError('%s: not a replay' % filename)
+        (magic, version, seed, step, winx, winy, ticks, count) = \
+            HEADER.unpack_from(bytes(data[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError('%s: not a replay' % filename)
+        if version != VERSION:
+            raise ValueError('%s: replay version %d, expected %d' %
+                             (filename, version, VERSION))
+        recording = Recording(seed, (winx, winy), step)
+        recording.ticks = ticks
+        offset = HEADER.size
+        tick = 0
+        for i in range(count):
+            (delta, offset) = _get_varint(data, offset)
+            if offset >= len(data):
+                raise ValueError('%s: truncated replay' % filename)
+            tick += delta
+            byte = data[offset]
+            offset += 1
+            recording.record(tick, byte >> 1, bool(byte & 1))
+        return recording
+
+
+class Player():
+    # Feeds a Recording to a Simulation, one fixed step at a time.
+    # update() has the same signature as Simulation.update(), so a Player
+    # can be driven by a FixedStep clock in a window, or by play() as fast
+    # as it will go.
+    def __init__(self, recording, sim = None):
+        self.recording = recording
+        if sim == None:
+            sim = Simulation(recording.size, recording.seed)
+        self.sim = sim
+        # index of the next event to send
+        self.next = 0
+
+    def done(self):
+        return self.sim.tick >= self.recording.ticks
+
+    def update(self, frame_time):
+        # the step is whatever the recording used, not frame_time
+        sim = self.sim
+        events = self.recording.events
+        while self.next < len(events) and events[self.next][0] <= sim.tick:
+            (tick, action, press) = events[self.next]
+            sim.on_action(action, press)
+            self.next += 1
+        sim.update(self.recording.step)
+
+    def play(self, on_tick = None):
+        # fast forward to the end of the recording. on_tick(sim) is called
+        #  after every tick, eg. to time them. Returns the Simulation
+        while not self.done():
+            self.update(self.recording.step)
+            if on_tick != None:
+                on_tick(self.sim)
+        return self.sim
+
+
+def _put_varint(data, n):
+    # 7 bits per byte, low bits first, top bit set if there's more
+    while n >= 0x80:
+        data.append((n & 0x7f) | 0x80)
+        n >>= 7
+    data.append(n)
+
+def _get_varint(data, offset):
+    # returns (value, offset of the next byte)
+    n = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError('truncated varint')
+        byte = data[offset]
+        offset += 1
+        n |= (byte & 0x7f) << shift
+        if byte & 0x80 == 0:
+            return (n, offset)
+        shift += 7
@@ -0,0 +1,616 @@
+import random
+import math
+
+import numpy
+
+from vector import *
+from world import *
+from enums import *
+from objects import *
+from broadphase import *
+from store import *
+from tracing import *
+from pool import *
+from placement import *
+
+class FixedStep():
+    # Fixed timestep accumulator.
+    # Frames take however long they take, but the Simulation is always
+    # advanced in steps of exactly step seconds, so the same input gives the
+    # same game and fast objects can't tunnel through each other on a slow
+    # frame. Leftover time is carried to the next frame, alpha is how far
+    # that is into the next step, for drawing between the last two states.
+    def __init__(self, step = 1.0 / 60, max_steps = 5):
+        self.step = step
+        # most steps to run in one frame. If we're further behind than that
+        #  the backlog is dropped, otherwise a slow frame would mean more
+        #  steps next frame, which would be slower still
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        # steps dropped so far because of max_steps
+        self.dropped = 0
+
+    def advance(self, frame_time, update):
+        # call update(step) as many times as frame_time allows, returns the
+        #  number of calls
+        self.accumulator += frame_time
+        steps = 0
+        while self.accumulator >= self.step:
+            if steps == self.max_steps:
+                behind = int(self.accumulator / self.step)
+                self.dropped += behind
+                self.accumulator -= behind * self.step
+                break
+            update(self.step)
+            self.accumulator -= self.step
+            steps += 1
+        self.alpha = self.accumulator / self.step
+        return steps
+
+
+class Simulation():
+    # game logic class
+    # Owns the game objects, the collider, score, level and state. There's no
+    # window or OpenGL in here, so it runs without a display and as fast as
+    # you like. Game draws it and feeds it input.
+    def __init__(self, size, seed = None):
+        # world size as (x, y), usually the window size
+        self.size = size
+        # all the randomness in the game comes from the random module, so a
+        #  seed and the same inputs on the same ticks give the same game
+        if seed != None:
+            random.seed(seed)
+        # number of updates so far
+        self.tick = 0
+        # a replay.Recording to log every input to, or None
+        self.recorder = None
+        self._init_collider()
+        self._init_pools()
+        self.set_tracer(None)
+        
+        # list to hold all game objects, plus the same objects bucketed by class
+        self.items = []
+        self.buckets = dict()
+        # every object in the world or waiting to join it, by entity id
+        self.entities = dict()
+        self.next_id = 1
+        # During update() the world doesn't change shape: objects added are
+        #  staged in spawned, objects removed are queued in removed, and both
+        #  are applied once at the end of the tick, see _commit(). Between
+        #  ticks adds and removes happen straight away
+        self.updating = False
+        self.spawned = []
+        self.removed = []
+        self.meteors = []
+        # meteors in the world and staged, less the ones queued for removal
+        self.meteors_alive = 0
+        self.ship = None
+        self.bullet = None
+        # the state of all the objects in self.items lives in here
+        self.store = Store()
+
+        # set the initial score and level
+        self.score = 0
+        self.level = 1
+
+        # set the initial state (start screen)
+        self._init_start()
+
+    # misc initializers
+
+    def _init_collider(self):
+        self.collider = Collider()
+        # one spatial hash per object class, see collide_items()
+        self.broadphase = dict()
+        self.collider.register_methods(
+            self._cd_ship_meteor,
+            self._ch_ship_meteor,
+            Ship, Meteor)
+        self.collider.register_methods(
+            self._cd_bullet_meteor,
+            self._ch_bullet_meteor1,
+            Bullet, Meteor1,
+            self._cd_bullets_meteors)
+        self.collider.register_methods(
+            self._cd_bullet_meteor,
+            self._ch_bullet_meteor2,
+            Bullet, Meteor2,
+            self._cd_bullets_meteors)
+        self.collider.register_methods(
+            self._cd_bullet_meteor,
+            self._ch_bullet_meteor3,
+            Bullet, Meteor3,
+            self._cd_bullets_meteors)
+
+    def _init_pools(self):
+        # the objects which come and go during play are reused, see pool.py
+        self.pools = dict()
+        for cls in [Bullet, Meteor1, Meteor2, Meteor3]:
+            self.pools[cls] = Pool(cls, Vector2(0, 0), 0)
+
+    def _warm_pools(self):
+        # enough objects for a level without making any: a meteor1 splits
+        #  into 3 meteor2s, each of which splits into 3 meteor3s. A shot is
+        #  2 bullets and they're off screen in a second or two
+        self.pools[Meteor1].warm(self.level)
+        self.pools[Meteor2].warm(3 * self.level)
+        self.pools[Meteor3].warm(9 * self.level)
+        self.pools[Bullet].warm(16)
+
+    def set_tracer(self, tracer):
+        # time the phases of each tick, and every collision detector and
+        #  handler, with a tracing.Tracer. None turns tracing off
+        self.collider.set_tracer(None)
+        if tracer == None:
+            # never enabled, so every span is a no-op
+            tracer = Tracer(0)
+        self.tracer = tracer
+        self.span_update = tracer.name_id('update')
+        self.span_objects = tracer.name_id('update/objects')
+        self.span_step = tracer.name_id('update/step')
+        self.span_collide = tracer.name_id('update/collide')
+
+    # state initializers
+    
+    def _init_start(self):
+        # initialize the start screen
+        self.state = STATE.start
+        self.remove_all_items()
+        (winx, winy) = self.size
+        s1 = Font(
+            Vector2(winx / 2, winy / 2), 
+            Vector2(20, 30), 
+            {'just-x' : 'center',
+             'just-y' : 'center'})
+        s1.set_string('DIE TO DIE (O PERCENT CHANCE OF HAPPENING) ')
+        s1.color = [0.5, 0.5, 1]
+        self.add_item(s1)
+        s2 = Font(
+            Vector2(winx / 2, winy / 2 - 40), 
+            Vector2(10, 15), 
+            {'just-x' : 'center',
+             'just-y' : 'center',
+             'spacing': 0.3})
+        s2.set_string('ARROW KEYS TO MOVE')
+        s2.color = [0.7, 0.7, 0.7]
+        self.add_item(s2)
+        s2 = Font(
+            Vector2(winx / 2, winy / 2 - 63), 
+            Vector2(10, 15), 
+            {'just-x' : 'center',
+             'just-y' : 'center',
+             'spacing': 0.3})
+        s2.set_string('SPACE OR S TO SHOOT')
+        s2.color = [0.7, 0.7, 0.7]
+        self.add_item(s2)
+
+    def _init_level(self):
+        # initialize the level transition screen
+        self.level = self.level + 1
+        self.state = STATE.level
+        self.remove_all_items()
+        self._warm_pools()
+        (winx, winy) = self.size
+        s = Font(
+            Vector2(winx / 2, winy / 2), 
+            Vector2(20, 30), 
+            {'just-x' : 'center',
+             'just-y' : 'center'})
+        s.set_string('LEVEL %d' % self.level)
+        s.color = [0.5, 0.5, 1]
+        self.add_item(s)
+
+    def _init_play(self):
+        # initialize the game
+        self.remove_all_items()
+        self._warm_pools()
+        self.meteors = []
+        self.bullet = None
+        (winx, winy) = self.size
+        self.score_text = Font(
+            Vector2(5, winy - 5), 
+            Vector2(10, 15), 
+            {'just-x' : 'left',
+             'just-y' : 'top'})
+        self.add_item(self.score_text)
+        self.add_to_score(0)
+        self.state = STATE.play
+        self.add_ship()
+        self.add_meteor1()
+
+    def _init_game_over(self):
+        # initialize the game over screen
+        self.level = 1
+        self.score = 0
+        self.remove_all_items()
+        self.state = STATE.game_over
+        (winx, winy) = self.size
+        s = Font(
+            Vector2(winx / 2, winy / 2), 
+            Vector2(20, 30), 
+            {'just-x' : 'center',
+             'just-y' : 'center'})
+        s.set_string('MY BOTTOM GOES HBBFGBFHBGBFHGB DADDY"S REALLY ')
+        s.color = [1, 0, 0]
+        self.add_item(s)
+        self.add_item(self.score_text)
+
+    # helpers
+
+    def add_item(self, item):
+        item.id = self.next_id
+        self.next_id += 1
+        self.entities[item.id] = item
+        item.removing = False
+        if isinstance(item, Meteor):
+            self.meteors_alive += 1
+        if self.updating:
+            self.spawned.append(item)
+        else:
+            self._insert(item)
+
+    def remove_item(self, item):
+        # safe to call more than once, and for objects which are only staged
+        if item.id == None or item.id not in self.entities or item.removing:
+            return
+        item.remove = True
+        item.removing = True
+        if isinstance(item, Meteor):
+            self.meteors_alive -= 1
+        self.removed.append(item)
+        if not self.updating:
+            self._commit()
+
+    def remove_all_items(self):
+        for item in self.items + self.spawned:
+            item.detach()
+            item.id = None
+            if item.pool != None:
+                item.pool.release(item)
+        self.items = []
+        self.buckets = dict()
+        self.entities = dict()
+        self.spawned = []
+        self.removed = []
+        self.meteors_alive = 0
+
+    def _insert(self, item):
+        self.items.append(item)
+        self.store.adopt(item)
+        if item.__class__ in self.buckets:
+            self.buckets[item.__class__].append(item)
+        else:
+            self.buckets[item.__class__] = [item]
+
+    def _commit(self):
+        # apply the removes and adds queued up by the tick. Lists are
+        #  compacted in one pass each, which keeps them in order, rather than
+        #  a list.remove() scan per object
+        ship_died = False
+        if len(self.removed) > 0:
+            removed = self.removed
+            self.removed = []
+            for item in removed:
+                del self.entities[item.id]
+                item.id = None
+                if item == self.ship:
+                    ship_died = True
+            entities = self.entities
+            self.items = [item for item in self.items if item.id in entities]
+            for (cls, bucket) in self.buckets.items():
+                self.buckets[cls] = [item for item in bucket if item.id in entities]
+            self.meteors = [item for item in self.meteors if item.id in entities]
+            self.spawned = [item for item in self.spawned if item.id in entities]
+            # nothing can hold on to them now, back to the pools
+            for item in removed:
+                item.detach()
+                if item.pool != None:
+                    item.pool.release(item)
+        if len(self.spawned) > 0:
+            spawned = self.spawned
+            self.spawned = []
+            for item in spawned:
+                self._insert(item)
+        if ship_died:
+            # everything else goes with it
+            self._init_game_over()
+
+    def add_to_score(self, num):
+        self.score = self.score + num * self.level
+        self.score_text.set_string("SCORE %d" % self.score)
+
+    # game object initializers
+
+    def add_ship(self):
+        (winx, winy) = self.size
+        pos = Vector2(winx / 2, winy / 2)
+        self.ship = Ship(pos)
+        self.add_item(self.ship)
+
+    def add_bullet(self):
+        if self.bullet == None:
+            pos = self.ship.pos + self.ship.deg_to_vel(self.ship.deg) * self.ship.size.y / 2
+            self.bullet = self.pools[Bullet].acquire(pos, self.ship.deg)
+            self.add_item(self.bullet)
+
+            pos = self.ship.pos + self.ship.deg_to_vel(self.ship.deg) * self.ship.size.y * 2
+            self.bullet = self.pools[Bullet].acquire(pos, self.ship.deg)
+            self.add_item(self.bullet)
+
+    def add_meteor1(self):
+        # adds large meteors in random locations, with random directions.
+        # makes sure it's far enough away from the ship, and from each other,
+        # if there's room, see placement.Scatter
+        (winx, winy) = self.size
+        count = self.level
+        scatter = Scatter(winx, winy, math.sqrt(20000))
+        scatter.avoid(self.ship.pos)
+        for i in range(count):
+            pos = scatter.place()
+            deg = random.uniform(0, 360)
+            m = self.pools[Meteor1].acquire(pos, deg)
+            self.add_item(m)
+            self.meteors.append(m)
+
+    def add_meteor2(self, pos):
+        # adds meteor2s where a meteor1 was exploded (pos)
+        # uses random directions, but at least 0.2 * (360/count) degrees apart
+        count = 3
+        for deg in spread_angles(count, 0.2 * (360 / count)):
+            m = self.pools[Meteor2].acquire(pos, deg)
+            self.add_item(m)
+            self.meteors.append(m)
+
+    def add_meteor3(self, pos):
+        # adds meteor2s where an meteor1 was exploded (pos)
+        # uses random directions, but at least 0.2 * (360/count) degrees apart
+        count = 3
+        for deg in spread_angles(count, 0.2 * (360 / count)):
+            m = self.pools[Meteor3].acquire(pos, deg)
+            self.add_item(m)
+            self.meteors.append(m)
+
+    # input handler
+
+    def on_action(self, action, press):
+        # action is one of ACTION, press is true for key down, false for key up
+        if self.recorder != None:
+            self.recorder.record(self.tick, action, press)
+        if action == ACTION.start and press:
+            if self.state == STATE.start:
+                self._init_play()
+            elif self.state == STATE.game_over:
+                self._init_start()
+            elif self.state == STATE.level:
+                self._init_play()
+        elif action == ACTION.right:
+            if self.state == STATE.play:
+                self.ship.turn(TURN.right, press) 
+        elif action == ACTION.left:
+            if self.state == STATE.play:
+                self.ship.turn(TURN.left, press) 
+        elif action == ACTION.forward:
+            if self.state == STATE.play:
+                self.ship.thrust(THRUST.forward, press) 
+        elif action == ACTION.back:
+            if self.state == STATE.play:
+                self.ship.thrust(THRUST.back, press)
+        elif action == ACTION.fire and press:
+            if self.state == STATE.play:
+                self.add_bullet()
+
+    # update event handler
+
+    def update(self, frame_time):
+        tracer = self.tracer
+        start = tracer.begin()
+        # the collider only wraps its methods while the tracer is enabled, so
+        #  a disabled tracer costs nothing there
+        if tracer.enabled != (self.collider.tracer != None):
+            if tracer.enabled:
+                self.collider.set_tracer(tracer)
+            else:
+                self.collider.set_tracer(None)
+        WObject.transform_stats.new_frame()
+        self.store.snapshot()
+        # the last volley stops blocking fire() the tick after it's gone, as
+        #  it always has, so recorded games play back the same
+        if self.bullet != None and self.bullet.id == None:
+            self.bullet = None
+        self.updating = True
+        self.update_items(frame_time)
+        # check for collisions
+        if self.state == STATE.play:
+            self.collide_items()
+        self.updating = False
+        self._commit()
+        self.tick += 1
+        if self.recorder != None:
+            self.recorder.ticks = self.tick
+        tracer.end(self.span_update, start)
+
+    def update_items(self, frame_time):
+        tracer = self.tracer
+        start = tracer.begin()
+        # update game objects. Anything flagged outside the Simulation is
+        #  picked up here
+        for item in self.items:
+            if not item.remove and item.motion == MOTION.custom:
+                item.update(frame_time, self.size)
+            if item.remove:
+                self.remove_item(item)
+        tracer.end(self.span_objects, start)
+        # move everything else in one go
+        start = tracer.begin()
+        (winx, winy) = self.size
+        for item in self.store.step(frame_time, winx, winy):
+            self.remove_item(item)
+        tracer.end(self.span_step, start)
+
+    def collide_items(self):
+        start = self.tracer.begin()
+        # detect everything first, so the batch detectors see all their
+        #  pairs at once. Handlers only change health and removal, not
+        #  geometry, and handle() skips removed objects, so this hits the
+        #  same pairs as detecting and handling one pair at a time
+        pairs = list(self.collision_pairs())
+        hits = self.collider.collide_all(pairs)
+        for i in range(len(pairs)):
+            if hits[i]:
+                (item1, item2) = pairs[i]
+                self.collider.handle(item1, item2)
+                # the last meteor has gone, the rest of the pairs are stale
+                if self.state != STATE.play:
+                    break
+                if item1.remove:
+                    self.remove_item(item1)
+                if item2.remove:
+                    self.remove_item(item2)
+        self.tracer.end(self.span_collide, start)
+
+    def collision_pairs(self):
+        # Yields the candidate pairs for the narrow phase. Only pairs of object
+        #  classes with registered collision methods are visited, and within that
+        #  only the pairs of objects that share a spatial hash cell. Every
+        #  unordered pair is yielded once.
+        (winx, winy) = self.size
+        # adds and removes wait for the end of the tick, so the buckets stay
+        #  put while the pairs are handled
+        buckets = dict()
+        for (cls, bucket) in self.buckets.items():
+            if len(bucket) > 0:
+                buckets[cls] = bucket
+        classes = list(buckets.keys())
+        grids = dict()
+        for i in range(len(classes)):
+            for j in range(i, len(classes)):
+                cls1 = classes[i]
+                cls2 = classes[j]
+                if self.collider.find_methods(cls1, cls2) == None:
+                    continue
+                # hash the bigger bucket, query it with the smaller one
+                if len(buckets[cls1]) > len(buckets[cls2]):
+                    (cls1, cls2) = (cls2, cls1)
+                if not cls2 in grids:
+                    grid = self.broadphase.get(cls2)
+                    if grid == None:
+                        grid = SpatialHash()
+                        self.broadphase[cls2] = grid
+                    grid.rebuild(buckets[cls2], winx, winy)
+                    grids[cls2] = grid
+                if cls1 == cls2:
+                    for pair in grids[cls2].pairs():
+                        yield pair
+                else:
+                    for pair in self._query_pairs(buckets[cls1], grids[cls2]):
+                        yield pair
+
+    def _query_pairs(self, items, grid):
+        for item1 in items:
+            if not item1.remove:
+                for item2 in grid.query(item1):
+                    yield (item1, item2)
+
+    # collision detection methods (these could live anywhere really since they are purely functional)
+
+    def _cd_ship_meteor(self, ship, meteor):
+        # the ship hits if any of its points, inside the meteor's bounding
+        #  circle, has moved across one of the meteor's edges. Moves outside
+        #  the meteor's hull can't, see hull_overlaps()
+        points = ship.get_transformed()
+        (x, y, radius) = meteor.get_bounds()
+        dx = points[:, 0] - x
+        dy = points[:, 1] - y
+        inside = dx * dx + dy * dy < radius * radius
+        ship.transform_stats.requested += len(points)
+        if not inside.any():
+            return False
+        old = ship.get_transformed(2)[inside]
+        ship.transform_stats.requested += len(old)
+        new = points[inside]
+        near = hull_overlaps([meteor] * len(new), old, new)
+        if not near.any():
+            return False
+        moves = SegmentBatch(old[near], new[near])
+        return bool(meteor.get_segments().intersect_batch(moves).any())
+
+    def _cd_bullet_meteor(self, bullet, meteor):
+        # as _cd_bullets_meteors() for one pair
+        if meteor.bounding_circle().inside(bullet.pos):
+            start = bullet.get_last_pos(1)
+            if not hull_overlaps([meteor], [(start.x, start.y)],
+                                 [(bullet.pos.x, bullet.pos.y)])[0]:
+                return False
+            line1 = Line(start, bullet.pos)
+            for line2 in meteor.get_lines():
+                if line1.intersect(line2):
+                    return True
+        return False
+
+    def _cd_bullets_meteors(self, bullets, meteors):
+        # _cd_bullet_meteor() for many pairs at once: one bounding circle
+        #  test for all of them, then the coarse hull of each meteor a bullet
+        #  is inside against that bullet's path, then every edge of the
+        #  meteors that's left against the paths, in one go
+        n = len(bullets)
+        hits = numpy.zeros(n, numpy.bool_)
+        if n == 0:
+            return hits
+        pos = numpy.array([bullet.store.pos[bullet.slot] for bullet in bullets])
+        bounds = numpy.array([meteor.get_bounds() for meteor in meteors])
+        dx = pos[:, 0] - bounds[:, 0]
+        dy = pos[:, 1] - bounds[:, 1]
+        inside = numpy.flatnonzero(dx * dx + dy * dy < bounds[:, 2] * bounds[:, 2])
+        if len(inside) == 0:
+            return hits
+        starts = numpy.array([bullets[i].store.last_pos_at(bullets[i].slot, 1)
+                              for i in inside])
+        near = hull_overlaps([meteors[i] for i in inside], starts, pos[inside])
+        edges = dict()
+        for i in inside[near]:
+            segments = meteors[i].get_segments()
+            if len(segments) > 0:
+                edges[i] = segments
+        if len(edges) == 0:
+            return hits
+        keep = numpy.array([i in edges for i in inside])
+        inside = inside[keep]
+        paths = SegmentBatch(starts[keep], pos[inside])
+        counts = numpy.array([len(edges[i]) for i in inside])
+        crossed = SegmentBatch.concatenate([edges[i] for i in inside]).intersect_pairs(
+            paths.take(numpy.repeat(numpy.arange(len(inside)), counts)))
+        # any edge crossed, per pair
+        offsets = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+        hits[inside] = numpy.logical_or.reduceat(crossed, offsets)
+        return hits
+
+    # collision handling methods (these have to be here since they affect the game state)
+
+    def _ch_ship_meteor(self, ship, meteor):
+        ship.hit()
+
+    def _ch_bullet_meteor1(self, bullet, meteor):
+        meteor.hit()
+        bullet.hit()
+        if meteor.remove:
+            self.remove_item(meteor)
+            self.add_to_score(25)
+            self.add_meteor2(meteor.pos)
+
+    def _ch_bullet_meteor2(self, bullet, meteor):
+        meteor.hit()
+        bullet.hit()
+        if meteor.remove:
+            self.remove_item(meteor)
+            self.add_to_score(50)
+            self.add_meteor3(meteor.pos)
+
+    def _ch_bullet_meteor3(self, bullet, meteor):
+        meteor.hit()
+        bullet.hit()
+        if meteor.remove:
+            self.remove_item(meteor)
+            self.add_to_score(100)
+            if self.meteors_alive == 0:
+                self._init_level()
@@ -0,0 +1,463 @@
+import os
+import stat
+import select
+import socket
+import struct
+
+import numpy
+
+from enums import *
+from world import *
+from objects import *
+
+# snapshot header: magic, format version, kind, tick, tick of the snapshot
+#  a delta is against, score, level, state, world size, then how many
+#  objects have gone since that snapshot, how many are new and how many
+#  were there already
+HEADER = struct.Struct('<4sHBIIIHBHHIII')
+MAGIC = b'MSNP'
+VERSION = 1
+SNAPSHOT = enum('key', 'delta')
+
+# what each object is, 0 for anything else
+ENTITY = enum('ship', 'bullet', 'meteor1', 'meteor2', 'meteor3', 'font')
+ENTITY_CODES = {
+    Ship    : ENTITY.ship,
+    Bullet  : ENTITY.bullet,
+    Meteor1 : ENTITY.meteor1,
+    Meteor2 : ENTITY.meteor2,
+    Meteor3 : ENTITY.meteor3,
+    Font    : ENTITY.font,
+}
+
+# the part of an object which changes as it moves, one record per object
+DYNAMIC = numpy.dtype([('pos', '<f4', (2,)),
+                       ('vel', '<f4', (2,)),
+                       ('deg', '<f4'),
+                       ('health', 'u1')])
+# bits of the per object mask in a delta: which fields of DYNAMIC follow,
+#  and whether the static part (see Snapshot) changed
+CHANGED = [('pos', 1), ('vel', 2), ('deg', 4), ('health', 8)]
+CHANGED_STATIC = 16
+
+# a snapshot on the wire is its length, then the snapshot
+LENGTH = struct.Struct('<I')
+
+class Snapshot():
+    # The world at the end of a tick, as SnapshotEncoder.capture() takes it
+    # and SnapshotDecoder.decode() gives it back.
+    # Objects are in entity id order, see Simulation.add_item(): ids, types
+    # (ENTITY) and dynamic (DYNAMIC) have a row each. statics holds the
+    # parts that don't change as an object moves, by id, for objects which
+    # have one: a meteor's shape as the distance of each of its points from
+    # the middle, a font's text. See static_value().
+    def __init__(self, tick, score, level, state, size, ids, types, dynamic,
+                 statics):
+        self.tick = tick
+        self.score = score
+        self.level = level
+        self.state = state
+        self.size = size
+        self.ids = ids
+        self.types = types
+        self.dynamic = dynamic
+        self.statics = statics
+
+    def __len__(self):
+        return len(self.ids)
+
+    def static_value(self, index):
+        # the static part of the object at index: a float32 array of radii
+        #  for a meteor, a string for a font, None otherwise
+        data = self.statics.get(int(self.ids[index]))
+        if data == None:
+            return None
+        if self.types[index] == ENTITY.font:
+            return data.decode('utf-8')
+        return numpy.frombuffer(data, '<f4')
+
+
+class SnapshotEncoder():
+    # Snapshots of a Simulation as compact bytes.
+    # A key snapshot has everything. A delta has only what changed since the
+    # last snapshot encoded: the ids of objects that have gone, new objects
+    # in full, and for the rest a mask byte of which fields changed followed
+    # by just those fields, field by field. Static parts are sent with new
+    # objects, and again only if they change (a font's text).
+    # Positions and so on are float32, which is plenty to draw or analyse a
+    # game with, but isn't enough to restart one from.
+    def __init__(self):
+        # the last Snapshot encoded, deltas are against it
+        self.base = None
+        # meteor shapes by id, a meteor's shape never changes
+        self._shapes = dict()
+
+    def capture(self, sim):
+        # a Snapshot of sim. Call between ticks
+        items = sim.items
+        store = sim.store
+        n = len(items)
+        codes = ENTITY_CODES
+        shapes = self._shapes
+        ids = []
+        slots = []
+        types = []
+        health = []
+        statics = dict()
+        for item in items:
+            code = codes.get(item.__class__, 0)
+            id = item.id
+            ids.append(id)
+            slots.append(item.slot)
+            types.append(code)
+            if code >= ENTITY.meteor1 and code <= ENTITY.meteor3:
+                health.append(min(255, max(0, item.health)))
+                if id not in shapes:
+                    shapes[id] = _meteor_radii(item)
+                statics[id] = shapes[id]
+            else:
+                health.append(0)
+                if code == ENTITY.font:
+                    statics[id] = item.string.encode('utf-8')
+        if len(shapes) > 2 * n + 64:
+            self._shapes = dict([(id, shapes[id]) for id in ids if id in shapes])
+        ids = numpy.array(ids, '<u4')
+        slots = numpy.array(slots, numpy.intp)
+        types = numpy.array(types, 'u1')
+        health = numpy.array(health, 'u1')
+        order = numpy.argsort(ids, kind = 'stable')
+        slots = slots[order]
+        dynamic = numpy.empty(n, DYNAMIC)
+        dynamic['pos'] = store.pos[slots]
+        dynamic['vel'] = store.vel[slots]
+        dynamic['deg'] = store.deg[slots]
+        dynamic['health'] = health[order]
+        return Snapshot(sim.tick, sim.score, sim.level, sim.state, sim.size,
+                        ids[order], types[order], dynamic, statics)
+
+    def encode(self, snapshot, key = False):
+        # snapshot as bytes, a delta against the last one encoded unless key
+        #  is set or there's nothing to be a delta against
+        base = self.base
+        self.base = snapshot
+        if key or base == None:
+            return self._encode_key(snapshot)
+        return self._encode_delta(snapshot, base)
+
+    def _encode_key(self, snapshot):
+        ids = snapshot.ids
+        parts = [_header(snapshot, SNAPSHOT.key, 0, 0, len(ids), 0),
+                 ids.tobytes(), snapshot.types.tobytes(),
+                 snapshot.dynamic.tobytes(),
+                 _encode_statics(snapshot.statics, ids.tolist())]
+        return b''.join(parts)
+
+    def _encode_delta(self, snapshot, base):
+        ids = snapshot.ids
+        old = numpy.isin(ids, base.ids, assume_unique = True)
+        gone = base.ids[~numpy.isin(base.ids, ids, assume_unique = True)]
+        new = numpy.flatnonzero(~old)
+        kept = numpy.flatnonzero(old)
+        now = snapshot.dynamic[kept]
+        then = base.dynamic[numpy.searchsorted(base.ids, ids[kept])]
+        mask = numpy.zeros(len(kept), 'u1')
+        fields = []
+        for (field, bit) in CHANGED:
+            changed = now[field] != then[field]
+            if changed.ndim > 1:
+                changed = changed.any(1)
+            mask[changed] |= bit
+            fields.append(now[field][changed].tobytes())
+        # statics of new objects, and of fonts whose text has changed
+        static_ids = ids[new].tolist()
+        for i in kept[snapshot.types[kept] == ENTITY.font].tolist():
+            id = int(ids[i])
+            if snapshot.statics.get(id) != base.statics.get(id):
+                static_ids.append(id)
+                mask[numpy.searchsorted(kept, i)] |= CHANGED_STATIC
+        parts = [_header(snapshot, SNAPSHOT.delta, base.tick, len(gone),
+                         len(new), len(kept)),
+                 gone.tobytes(), ids[new].tobytes(),
+                 snapshot.types[new].tobytes(),
+                 snapshot.dynamic[new].tobytes(), mask.tobytes()]
+        parts += fields
+        parts.append(_encode_statics(snapshot.statics, static_ids))
+        return b''.join(parts)
+
+
+class SnapshotDecoder():
+    # SnapshotEncoder bytes back to Snapshots. Deltas need the snapshot
+    # before, so decode a stream in order, starting from a key snapshot.
+    def __init__(self):
+        self.base = None
+
+    def decode(self, data):
+        if len(data) < HEADER.size:
+            raise ValueError('truncated snapshot')
+        (magic, version, kind, tick, base_tick, score, level, state,
+         winx, winy, n_gone, n_new, n_kept) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('not a snapshot')
+        if version != VERSION:
+            raise ValueError('snapshot version %d, expected %d' %
+                             (version, VERSION))
+        reader = _Reader(data, HEADER.size)
+        base = self.base
+        if kind == SNAPSHOT.delta:
+            if base == None or base.tick != base_tick:
+                raise ValueError('delta against tick %d, no snapshot for it' %
+                                 base_tick)
+            gone = reader.array('<u4', n_gone)
+        new_ids = reader.array('<u4', n_new)
+        new_types = reader.array('u1', n_new)
+        new_dynamic = reader.array(DYNAMIC, n_new)
+        if kind == SNAPSHOT.key:
+            ids = new_ids
+            types = new_types
+            dynamic = new_dynamic.copy()
+            statics = dict()
+        else:
+            keep = ~numpy.isin(base.ids, gone, assume_unique = True)
+            if numpy.count_nonzero(keep) != n_kept:
+                raise ValueError('delta doesn\'t match the snapshot before it')
+            dynamic = base.dynamic[keep]
+            mask = reader.array('u1', n_kept)
+            for (field, bit) in CHANGED:
+                changed = mask & bit != 0
+                dynamic[field][changed] = reader.array(DYNAMIC[field],
+                                                       numpy.count_nonzero(changed))
+            kept_ids = base.ids[keep]
+            ids = numpy.concatenate((kept_ids, new_ids))
+            types = numpy.concatenate((base.types[keep], new_types))
+            dynamic = numpy.concatenate((dynamic, new_dynamic))
+            order = numpy.argsort(ids, kind = 'stable')
+            (ids, types, dynamic) = (ids[order], types[order], dynamic[order])
+            statics = dict([(id, base.statics[id]) for id in kept_ids.tolist()
+                            if id in base.statics])
+        statics.update(reader.statics())
+        snapshot = Snapshot(tick, score, level, state, (winx, winy),
+                            ids, types, dynamic, statics)
+        self.base = snapshot
+        return snapshot
+
+
+class SpectatorServer():
+    # Streams Snapshots of a game to anyone who connects to the Unix socket
+    # at path, rate snapshots a second of game time.
+    # Nothing here blocks: publish() is called between ticks, takes a
+    # snapshot when one is due, queues it for every spectator and sends each
+    # what its socket will take there and then. A spectator that falls more
+    # than max_backlog bytes behind has its queue dropped and gets a key
+    # snapshot once it has caught up, so a slow one never holds up the game.
+    # Snapshots are only taken while someone is watching.
+    def __init__(self, path, rate = 10, step = 1.0 / 60,
+                 max_backlog = 1 << 20):
+        self.path = path
+        # ticks between snapshots
+        self.every = max(1, int(round(1.0 / (rate * step))))
+        self.max_backlog = max_backlog
+        # a socket left behind by an earlier run is in the way, anything else
+        #  at path isn't ours to remove
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        self.sock.listen(8)
+        self.sock.setblocking(False)
+        self.encoder = SnapshotEncoder()
+        self.clients = []
+        self.last_tick = None
+        # snapshots taken, and queues dropped because a spectator was slow
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, sim):
+        # returns True if a snapshot was taken
+        self._accept()
+        taken = False
+        due = (self.last_tick == None or sim.tick < self.last_tick or
+               sim.tick - self.last_tick >= self.every)
+        if len(self.clients) > 0 and due:
+            self.last_tick = sim.tick
+            snapshot = self.encoder.capture(sim)
+            data = self.encoder.encode(snapshot)
+            key = None
+            for client in self.clients:
+                if client.resync:
+                    if key == None:
+                        key = self.encoder.encode(snapshot, True)
+                    client.queue(key)
+                    client.resync = False
+                else:
+                    client.queue(data)
+            self.published += 1
+            taken = True
+        for client in self.clients:
+            client.flush()
+            if client.backlog > self.max_backlog:
+                client.drop()
+                self.dropped += 1
+        self.clients = [client for client in self.clients if not client.closed]
+        return taken
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+        self.clients = []
+        self.sock.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept(self):
+        while True:
+            try:
+                (sock, address) = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            self.clients.append(_Spectator(sock))
+
+
+class SpectatorClient():
+    # The other end of a SpectatorServer.
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.setblocking(False)
+        self.decoder = SnapshotDecoder()
+        self.buffer = bytearray()
+        # set once the server has gone
+        self.closed = False
+
+    def receive(self, timeout = 0):
+        # every Snapshot that has arrived, oldest first, waiting up to timeout
+        #  seconds for the first
+        if not self.closed and timeout > 0:
+            select.select([self.sock], [], [], timeout)
+        while not self.closed:
+            try:
+                data = self.sock.recv(1 << 16)
+            except (BlockingIOError, InterruptedError):
+                break
+            if len(data) == 0:
+                self.closed = True
+            self.buffer += data
+        snapshots = []
+        offset = 0
+        buffer = self.buffer
+        while len(buffer) - offset >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(buffer, offset)
+            end = offset + LENGTH.size + length
+            if end > len(buffer):
+                break
+            snapshots.append(self.decoder.decode(bytes(buffer[offset + LENGTH.size:end])))
+            offset = end
+        del buffer[:offset]
+        return snapshots
+
+    def close(self):
+        self.sock.close()
+        self.closed = True
+
+
+class _Spectator():
+    # a connection to a SpectatorServer, and what's waiting to be sent to it
+    def __init__(self, sock):
+        self.sock = sock
+        # snapshots to send, and how much of the first has gone already
+        self.pending = []
+        self.sent = 0
+        self.backlog = 0
+        # next snapshot must be a key snapshot
+        self.resync = True
+        self.closed = False
+
+    def queue(self, data):
+        self.pending.append(LENGTH.pack(len(data)) + data)
+        self.backlog += LENGTH.size + len(data)
+
+    def flush(self):
+        while len(self.pending) > 0 and not self.closed:
+            first = self.pending[0]
+            try:
+                n = self.sock.send(memoryview(first)[self.sent:])
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self.close()
+                return
+            self.sent += n
+            self.backlog -= n
+            if self.sent == len(first):
+                self.pending.pop(0)
+                self.sent = 0
+
+    def drop(self):
+        # throw away the queue, but finish a snapshot that's half sent or the
+        #  stream is garbage
+        if self.sent > 0:
+            first = self.pending[0]
+            self.pending = [first]
+            self.backlog = len(first) - self.sent
+        else:
+            self.pending = []
+            self.backlog = 0
+        self.resync = True
+
+    def close(self):
+        self.sock.close()
+        self.closed = True
+
+
+class _Reader():
+    # reads arrays one after another out of a snapshot
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    def array(self, dtype, count):
+        dtype = numpy.dtype(dtype)
+        end = self.offset + dtype.itemsize * count
+        if end > len(self.data):
+            raise ValueError('truncated snapshot')
+        array = numpy.frombuffer(self.data, dtype, count, self.offset)
+        self.offset = end
+        return array
+
+    def statics(self):
+        # id -> bytes, see _encode_statics()
+        (count,) = struct.unpack_from('<I', self.data, self.offset)
+        self.offset += 4
+        ids = self.array('<u4', count).tolist()
+        lengths = self.array('<u2', count).tolist()
+        statics = dict()
+        offset = self.offset
+        for (id, length) in zip(ids, lengths):
+            statics[id] = bytes(self.data[offset:offset + length])
+            offset += length
+        if offset > len(self.data):
+            raise ValueError('truncated snapshot')
+        self.offset = offset
+        return statics
+
+
+def _header(snapshot, kind, base_tick, gone, new, kept):
+    (winx, winy) = snapshot.size
+    return HEADER.pack(MAGIC, VERSION, kind, snapshot.tick, base_tick,
+                       snapshot.score, snapshot.level, snapshot.state,
+                       int(winx), int(winy), gone, new, kept)
+
+def _encode_statics(statics, ids):
+    # the statics of ids: a count, the ids, their lengths, then the data
+    ids = [id for id in ids if id in statics]
+    values = [statics[id] for id in ids]
+    return b''.join([struct.pack('<I', len(ids)),
+                     numpy.array(ids, '<u4').tobytes(),
+                     numpy.array([len(value) for value in values], '<u2').tobytes()] +
+                    values)
+
+def _meteor_radii(meteor):
+    # a meteor's shape as the distance of each point from the middle of the
+    #  unit square, as float32 bytes, see Meteor.generate_point_array()
+    ring = meteor.get_point_array()[0::2] - 0.5
+    return numpy.hypot(ring[:, 0], ring[:, 1]).astype('<f4').tobytes()
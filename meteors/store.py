@@ -0,0 +1,220 @@
+import numpy
+
+from enums import *
+
+class Store():
+    # Struct-of-arrays storage for WObject state.
+    # Position, velocity, angle, turn speed, size and the recent history of
+    # position and angle live in contiguous numpy arrays, one row (slot) per
+    # object. A WObject is a thin handle (store, slot) into one of these.
+    # Objects which are in the world share the world's store, so the objects
+    # which move in a simple way (see MOTION) can all be stepped with a few
+    # vectorized operations per tick, rather than a python update() each.
+    # Objects which are not in the world get a small private store of their own.
+    def __init__(self, capacity = 64, history = 5, track_owners = True):
+        # number of past pos/deg kept for each object
+        self.history = history
+        # slots below count have been handed out at some point
+        self.count = 0
+        # bumped every time a slot is handed out or freed
+        self.version = 0
+        self.capacity = 0
+        self.free = []
+        # slot -> object, so the objects a step affects can be found
+        self.track_owners = track_owners
+        self.owners = []
+        self._resize(max(1, capacity), history)
+
+    def _resize(self, capacity, history):
+        # (re)allocate the arrays, keeping what's there
+        if self.capacity > 0 and history != self.history:
+            self._unroll()
+        h = history
+        for (name, shape, dtype) in [
+                ('pos', (2,), numpy.float64),
+                ('vel', (2,), numpy.float64),
+                ('deg', (), numpy.float64),
+                ('turn_speed', (), numpy.float64),
+                ('size', (2,), numpy.float64),
+                ('motion', (), numpy.int8),
+                # set whenever pos, deg or size change, see WObject.get_transformed()
+                ('dirty', (), numpy.bool_),
+                # pos and deg at the start of the last tick, see interpolate()
+                ('prev_pos', (2,), numpy.float64),
+                ('prev_deg', (), numpy.float64),
+                # ring buffers of past states, see last_pos_at()
+                ('last_pos', (h, 2), numpy.float64),
+                ('last_deg', (h,), numpy.float64),
+                ('pos_head', (), numpy.intp),
+                ('deg_head', (), numpy.intp)]:
+            new = numpy.zeros((capacity,) + shape, dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                keep = tuple([slice(0, min(a, b)) for (a, b) in zip(old.shape, new.shape)])
+                new[keep] = old[keep]
+                if name in ['last_pos', 'last_deg'] and h > old.shape[1]:
+                    # pad a longer history out with the oldest state we have
+                    new[:, old.shape[1]:] = old[:, -1:]
+            setattr(self, name, new)
+        self.owners = self.owners + [None] * (capacity - len(self.owners))
+        self.capacity = capacity
+        self.history = history
+
+    def _unroll(self):
+        # rotate every ring so its most recent entry is at index 0
+        n = self.count
+        ages = numpy.arange(self.history)
+        rows = numpy.arange(n)[:, None]
+        self.last_pos[:n] = self.last_pos[rows, (self.pos_head[:n, None] + ages) % self.history]
+        self.last_deg[:n] = self.last_deg[rows, (self.deg_head[:n, None] + ages) % self.history]
+        self.pos_head[:n] = 0
+        self.deg_head[:n] = 0
+
+    def alloc(self, owner = None):
+        # returns a free slot
+        if len(self.free) > 0:
+            slot = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self._resize(self.capacity * 2, self.history)
+            slot = self.count
+            self.count = self.count + 1
+        if self.track_owners:
+            self.owners[slot] = owner
+        self.dirty[slot] = True
+        self.version = self.version + 1
+        return slot
+
+    def release(self, slot):
+        # free slots are never stepped
+        self.motion[slot] = 0
+        self.owners[slot] = None
+        self.free.append(slot)
+        self.version = self.version + 1
+
+    def adopt(self, obj):
+        # move an object's state from whatever store it is in to this one
+        if obj.store is self:
+            return
+        if obj.state_buffer > self.history:
+            self._resize(self.capacity, obj.state_buffer)
+        src = obj.store
+        s = obj.slot
+        slot = self.alloc(obj)
+        self.pos[slot] = src.pos[s]
+        self.vel[slot] = src.vel[s]
+        self.deg[slot] = src.deg[s]
+        self.turn_speed[slot] = src.turn_speed[s]
+        self.size[slot] = src.size[s]
+        self.prev_pos[slot] = src.pos[s]
+        self.prev_deg[slot] = src.deg[s]
+        h = min(self.history, src.history)
+        self.last_pos[slot, :h] = src.pos_history(s)[:h]
+        self.last_deg[slot, :h] = src.deg_history(s)[:h]
+        self.pos_head[slot] = 0
+        self.deg_head[slot] = 0
+        self.motion[slot] = obj.motion
+        src.release(s)
+        obj.store = self
+        obj.slot = slot
+
+    # The pos and deg history of each slot is a ring buffer: pushing is O(1)
+    # however long the history is. The head is the index of the most recent
+    # entry, ie. the state just before the current one, which is age 0.
+
+    def push_pos(self, slot):
+        # record the current pos in the history
+        head = (self.pos_head[slot] - 1) % self.history
+        self.pos_head[slot] = head
+        self.last_pos[slot, head] = self.pos[slot]
+
+    def push_deg(self, slot):
+        # record the current deg in the history
+        head = (self.deg_head[slot] - 1) % self.history
+        self.deg_head[slot] = head
+        self.last_deg[slot, head] = self.deg[slot]
+
+    def last_pos_at(self, slot, age):
+        return self.last_pos[slot, (self.pos_head[slot] + age) % self.history]
+
+    def last_deg_at(self, slot, age):
+        return self.last_deg[slot, (self.deg_head[slot] + age) % self.history]
+
+    def pos_history(self, slot):
+        # the whole pos history of a slot, most recent first
+        ages = numpy.arange(self.pos_head[slot], self.pos_head[slot] + self.history)
+        return self.last_pos[slot, ages % self.history]
+
+    def deg_history(self, slot):
+        # the whole deg history of a slot, most recent first
+        ages = numpy.arange(self.deg_head[slot], self.deg_head[slot] + self.history)
+        return self.last_deg[slot, ages % self.history]
+
+    def snapshot(self):
+        # remember where everything is before a tick
+        n = self.count
+        self.prev_pos[:n] = self.pos[:n]
+        self.prev_deg[:n] = self.deg[:n]
+
+    def interpolate(self, alpha, winx, winy):
+        # (pos, deg) for every slot, alpha of the way from the snapshot to now.
+        # Anything that moved more than half the world in one tick has
+        # wrapped round the edge, it's drawn where it is now rather than
+        # being swept across the screen. deg goes the short way round.
+        n = self.count
+        return interpolate(self.prev_pos[:n], self.pos[:n],
+                           self.prev_deg[:n], self.deg[:n], alpha, winx, winy)
+
+    def step(self, time, winx, winy):
+        # Integrate every object whose motion is not MOTION.custom in one pass.
+        # This does the same thing as Meteor.update() and Bullet.update().
+        # Apart from the history, everything works on whole columns with masks
+        # rather than gathering the rows of each kind, it's quicker for numpy.
+        # Returns a list of the objects that should now be removed.
+        n = self.count
+        motion = self.motion[:n]
+        wrap = motion == MOTION.wrap
+        cull = motion == MOTION.cull
+        moving = wrap | cull
+        if not moving.any():
+            return []
+
+        # meteors keep a pos and deg history, bullets just pos
+        slots = numpy.flatnonzero(moving)
+        heads = (self.pos_head[slots] - 1) % self.history
+        self.pos_head[slots] = heads
+        self.last_pos[slots, heads] = self.pos[slots]
+        slots = numpy.flatnonzero(wrap)
+        heads = (self.deg_head[slots] - 1) % self.history
+        self.deg_head[slots] = heads
+        self.last_deg[slots, heads] = self.deg[slots]
+
+        # spin meteors, move meteors and bullets
+        self.deg[:n] += self.turn_speed[:n] * (time * wrap)
+        self.pos[:n] += self.vel[:n] * (time * moving)[:, None]
+        self.dirty[:n] |= moving
+
+        # meteors can go off the edge, but jump to the opposite one once they're
+        # fully off screen
+        x = self.pos[:n, 0]
+        y = self.pos[:n, 1]
+        sx = self.size[:n, 0]
+        sy = self.size[:n, 1]
+        numpy.copyto(x, x + (1.5 * sx + winx), where = wrap & (x < 0 - sx / 2))
+        numpy.copyto(x, x - (1.5 * sx + winx), where = wrap & (x > winx + sx))
+        numpy.copyto(y, y + (1.5 * sy + winy), where = wrap & (y < 0 - sy))
+        numpy.copyto(y, y - (1.5 * sy + winy), where = wrap & (y > winy + sy))
+
+        # bullets are removed once off screen
+        out = cull & ((x < 0) | (x > winx) | (y < 0) | (y > winy))
+        return [self.owners[slot] for slot in numpy.flatnonzero(out)]
+
+
+def interpolate(prev_pos, pos, prev_deg, deg, alpha, winx, winy):
+    # Store.interpolate() on any columns, eg. ones read from another process
+    move = pos - prev_pos
+    jump = (numpy.abs(move[:, 0]) > winx / 2.0) | (numpy.abs(move[:, 1]) > winy / 2.0)
+    pos = numpy.where(jump[:, None], pos, prev_pos + move * alpha)
+    turn = (deg - prev_deg + 180) % 360 - 180
+    deg = prev_deg + turn * alpha
+    return (pos, deg)
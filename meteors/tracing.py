@@ -0,0 +1,149 @@
+import time
+
+import numpy
+
+# the best clock we have
+try:
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+class Tracer():
+    # Timing spans for the phases of a frame.
+    # A span is a name and a start and end time. They are recorded into
+    # preallocated arrays used as a ring buffer, so tracing a long game keeps
+    # the most recent spans and never allocates. Export them as a Chrome trace
+    # (load in chrome://tracing or ui.perfetto.dev), or summarize them.
+    # Usage:
+    #   start = tracer.begin()
+    #   ... work ...
+    #   tracer.end(SPAN, start)
+    # where SPAN is from tracer.name_id('name'), looked up once, not per span.
+    # begin() returns None when tracing is disabled and end() does nothing
+    # with that, so leaving the calls in costs two method calls per span.
+    def __init__(self, capacity = 65536):
+        self.capacity = capacity
+        self.enabled = False
+        # span name <-> id
+        self.names = []
+        self.ids = dict()
+        # per name id, number of spans and their total time since clear(),
+        #  however many the ring has room for
+        self.calls = []
+        self.total = []
+        self.name = numpy.zeros(capacity, numpy.int32)
+        self.start = numpy.zeros(capacity, numpy.float64)
+        self.dur = numpy.zeros(capacity, numpy.float64)
+        # total number of spans ever recorded, the ring holds the last capacity
+        self.count = 0
+        self.origin = clock()
+
+    def enable(self):
+        self.enabled = self.capacity > 0
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.count = 0
+        self.calls = [0] * len(self.names)
+        self.total = [0.0] * len(self.names)
+        self.origin = clock()
+
+    def name_id(self, name):
+        # intern a span name
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.calls.append(0)
+            self.total.append(0.0)
+        return self.ids[name]
+
+    def begin(self):
+        if self.enabled:
+            return clock()
+        return None
+
+    def end(self, name_id, start):
+        if start is None:
+            return
+        dur = clock() - start
+        i = self.count % self.capacity
+        self.name[i] = name_id
+        self.start[i] = start
+        self.dur[i] = dur
+        self.count += 1
+        self.calls[name_id] += 1
+        self.total[name_id] += dur
+
+    def wrap(self, name, fn):
+        # fn with a span around every call
+        name_id = self.name_id(name)
+        def traced(*args):
+            start = self.begin()
+            result = fn(*args)
+            self.end(name_id, start)
+            return result
+        traced.__name__ = getattr(fn, '__name__', name)
+        return traced
+
+    def totals(self):
+        # name -> (number of spans, total seconds) for every span since clear()
+        return dict([(self.names[i], (self.calls[i], self.total[i]))
+                     for i in range(len(self.names)) if self.calls[i] > 0])
+
+    def spans(self):
+        # (name ids, starts, durations) of the recorded spans, oldest first
+        n = min(self.count, self.capacity)
+        first = self.count - n
+        order = (numpy.arange(n) + first) % max(1, self.capacity)
+        return (self.name[order], self.start[order], self.dur[order])
+
+    def chrome_trace(self):
+        # the spans in Chrome trace event format, times in microseconds
+        (names, starts, durs) = self.spans()
+        events = []
+        for i in range(len(names)):
+            name = self.names[names[i]]
+            events.append({'name': name,
+                           'cat': name.split('/')[0],
+                           'ph': 'X',
+                           'ts': (starts[i] - self.origin) * 1e6,
+                           'dur': durs[i] * 1e6,
+                           'pid': 1,
+                           'tid': 1})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, filename):
+        # json is only needed here, don't make every import of the
+        #  Simulation pay for it
+        import json
+        with open(filename, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self, percentiles = (50, 90, 99)):
+        # per span name: count, total, mean, max and percentiles, all in ms
+        (names, starts, durs) = self.spans()
+        result = dict()
+        for name_id in numpy.unique(names):
+            d = durs[names == name_id] * 1000
+            stats = {'count': len(d),
+                     'total': d.sum(),
+                     'mean': d.mean(),
+                     'max': d.max()}
+            for (p, v) in zip(percentiles, numpy.percentile(d, percentiles)):
+                stats['p%g' % p] = v
+            result[self.names[name_id]] = stats
+        return result
+
+    def format_summary(self, percentiles = (50, 90, 99)):
+        # summary() as a table
+        summary = self.summary(percentiles)
+        columns = ['p%g' % p for p in percentiles] + ['max']
+        lines = ['%-36s %8s' % ('span (ms)', 'count') +
+                 ''.join(['%9s' % c for c in columns])]
+        for name in sorted(summary.keys()):
+            stats = summary[name]
+            lines.append('%-36s %8d' % (name, stats['count']) +
+                         ''.join(['%9.3f' % stats[c] for c in columns]))
+        return '\n'.join(lines)
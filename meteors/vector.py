@@ -1,5 +1,7 @@
 import math
 
+import numpy
+
 # float comparison courtesy of stack overflow
 # http://stackoverflow.com/questions/10334688/how-dangerous-is-it-to-compare-floating-point-values
 FL_EPS = 0.0000001192092896
@@ -7,8 +9,12 @@ FL_MIN = 1.175494e-38
 def near(f1, f2, k = 1):
     return (abs(f1 - f2) < k * FL_EPS * abs(f1 + f2) or abs(f1 - f2) < FL_MIN)
 
-class Vector2():
+class Vector2(object):
     # 2D vector/point
+    # the operators make new vectors. The in-place ones (+=, -=, *=) and the
+    # helpers below don't, use them in code that runs every frame
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -31,6 +37,40 @@ class Vector2():
     def __div__(self, scalar):
         return Vector2(self.x / scalar, self.y / scalar)
 
+    __truediv__ = __div__
+
+    def __iadd__(self, v2):
+        self.x += v2.x
+        self.y += v2.y
+        return self
+
+    def __isub__(self, v2):
+        self.x -= v2.x
+        self.y -= v2.y
+        return self
+
+    def __imul__(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+    def add_scaled(self, v2, scalar):
+        # self += v2 * scalar, without the temporary
+        self.x += v2.x * scalar
+        self.y += v2.y * scalar
+        return self
+
+    def dist2(self, v2):
+        # squared distance to v2, abs(self - v2) without the temporary
+        dx = self.x - v2.x
+        dy = self.y - v2.y
+        return dx * dx + dy * dy
+
     def update(self, v2):
         # use this instead of assignment to update a vector in place
         self.x = v2.x
@@ -51,8 +91,10 @@ class Vector2():
         return Vector2(self.x / denom, self.y / denom)
 
 
-class Line():
+class Line(object):
     # line segment helper. start and end are Vector2
+    __slots__ = ('start', 'end')
+
     def __init__(self, start, end):
         # if the two points are actually exactly same (happens very rarely, only on 0,0),
         # then fake a short line so it still responds to intersection
@@ -82,14 +124,19 @@ class Line():
 
     def within(self, point):
         # returns true if the point lies within the box formed by the start and end points
-        if near(self.start.x, self.end.x):
-            c1 = near(point.x, self.start.x)
+        return self._within(point.x, point.y)
+
+    def _within(self, x, y):
+        start = self.start
+        end = self.end
+        if near(start.x, end.x):
+            c1 = near(x, start.x)
         else:
-            c1 = point.x < max(self.start.x, self.end.x) and point.x > min(self.start.x, self.end.x)
-        if near(self.start.y, self.end.y):
-            c2 = near(point.y, self.start.y)
+            c1 = x < max(start.x, end.x) and x > min(start.x, end.x)
+        if near(start.y, end.y):
+            c2 = near(y, start.y)
         else:
-            c2 = point.y < max(self.start.y, self.end.y) and point.y > min(self.start.y, self.end.y)
+            c2 = y < max(start.y, end.y) and y > min(start.y, end.y)
         return c1 and c2
 
     def intersection(self, line):
@@ -107,18 +154,159 @@ class Line():
 
     def intersect(self, line):
         # returns true if the line segments intersect
-        point = self.intersection(line)
-        if point:
-            return self.within(point) and line.within(point)
-        else:
+        # same as intersection() then within(), but this is the hot path of
+        # collision detection so it's done inline with no temporaries
+        s1 = self.start
+        e1 = self.end
+        s2 = line.start
+        e2 = line.end
+        a1 = e1.y - s1.y
+        b1 = s1.x - e1.x
+        c1 = a1 * s1.x + b1 * s1.y
+        a2 = e2.y - s2.y
+        b2 = s2.x - e2.x
+        c2 = a2 * s2.x + b2 * s2.y
+        det = a1 * b2 - a2 * b1
+        if det == 0:
             return False
+        x = float(b2 * c1 - b1 * c2) / det
+        y = float(a1 * c2 - a2 * c1) / det
+        return self._within(x, y) and line._within(x, y)
+
+class SegmentBatch(object):
+    # N line segments as numpy arrays, to test many segments at once.
+    # The tests give exactly the answers Line.intersect() would for each pair
+    # in turn, including parallel segments (never intersect) and zero length
+    # segments (nudged by 0.1 like Line does), but with a few numpy
+    # operations rather than a python loop.
+    # Everything broadcasts, so a batch of 1 against a batch of n, n against
+    # n pairwise, or column() of m against n for every combination all work.
+    __slots__ = ('a', 'b', 'c', 'x0', 'x1', 'y0', 'y1',
+                 'flat_x', 'flat_y', 'start_x', 'start_y')
 
-class BoundingCircle():
+    def __init__(self, starts, ends):
+        # starts and ends are n x 2 arrays
+        starts = numpy.array(starts, numpy.float64).reshape(-1, 2)
+        ends = numpy.asarray(ends, numpy.float64).reshape(-1, 2)
+        same = (starts[:, 0] == ends[:, 0]) & (starts[:, 1] == ends[:, 1])
+        starts[same] += 0.1
+        sx = starts[:, 0]
+        sy = starts[:, 1]
+        ex = ends[:, 0]
+        ey = ends[:, 1]
+        # Ax + By = C, see Line.get_abc()
+        self.a = ey - sy
+        self.b = sx - ex
+        self.c = self.a * sx + self.b * sy
+        # the box for within(). flat_x is set where the segment is vertical,
+        #  and a point must be near start_x rather than inside the box
+        self.x0 = numpy.minimum(sx, ex)
+        self.x1 = numpy.maximum(sx, ex)
+        self.y0 = numpy.minimum(sy, ey)
+        self.y1 = numpy.maximum(sy, ey)
+        self.flat_x = _near(sx, ex)
+        self.flat_y = _near(sy, ey)
+        self.start_x = sx
+        self.start_y = sy
+
+    @staticmethod
+    def from_points(points):
+        # segments from an n x 2 array of start, end, start, end ... points,
+        #  as drawn with GL_LINES, see WObject.get_lines()
+        points = numpy.asarray(points, numpy.float64)
+        n = len(points) // 2 * 2
+        return SegmentBatch(points[0:n:2], points[1:n:2])
+
+    @staticmethod
+    def from_lines(lines):
+        return SegmentBatch([(l.start.x, l.start.y) for l in lines],
+                            [(l.end.x, l.end.y) for l in lines])
+
+    @staticmethod
+    def from_line(line):
+        # a batch of one Line. The fields are python numbers rather than
+        #  arrays, they broadcast just the same and are much quicker to make
+        result = SegmentBatch.__new__(SegmentBatch)
+        start = line.start
+        end = line.end
+        (result.a, result.b, result.c) = line.get_abc()
+        result.x0 = min(start.x, end.x)
+        result.x1 = max(start.x, end.x)
+        result.y0 = min(start.y, end.y)
+        result.y1 = max(start.y, end.y)
+        result.flat_x = near(start.x, end.x)
+        result.flat_y = near(start.y, end.y)
+        result.start_x = start.x
+        result.start_y = start.y
+        return result
+
+    @staticmethod
+    def concatenate(batches):
+        # one batch of all the segments in a list of batches
+        result = SegmentBatch.__new__(SegmentBatch)
+        for name in SegmentBatch.__slots__:
+            setattr(result, name,
+                    numpy.concatenate([getattr(batch, name) for batch in batches]))
+        return result
+
+    def _map(self, fn):
+        result = SegmentBatch.__new__(SegmentBatch)
+        for name in SegmentBatch.__slots__:
+            setattr(result, name, fn(getattr(self, name)))
+        return result
+
+    def take(self, index):
+        # the segments at index (an int array or bool mask)
+        return self._map(lambda array: array[index])
+
+    def column(self):
+        # the segments along a new first axis, so tests against an n batch
+        #  give m x n results
+        return self._map(lambda array: array[:, None])
+
+    def __len__(self):
+        return len(self.a)
+
+    def within(self, x, y):
+        # Line.within() for every segment, x and y broadcast against them
+        cx = numpy.where(self.flat_x, _near(x, self.start_x),
+                         (x < self.x1) & (x > self.x0))
+        cy = numpy.where(self.flat_y, _near(y, self.start_y),
+                         (y < self.y1) & (y > self.y0))
+        return cx & cy
+
+    def intersect(self, line):
+        # a Line against every segment, returns a bool array of length n
+        return self.intersect_pairs(SegmentBatch.from_line(line))
+
+    def intersect_batch(self, other):
+        # every segment of other against every segment of this batch,
+        #  returns an m x n bool array, other along the first axis
+        return self.intersect_pairs(other.column())
+
+    def intersect_pairs(self, other):
+        # segment i of other against segment i of this batch, broadcasting
+        #  as numpy does
+        det = other.a * self.b - self.a * other.b
+        parallel = det == 0
+        det = numpy.where(parallel, 1, det)
+        x = (self.b * other.c - other.b * self.c) / det
+        y = (other.a * self.c - self.a * other.c) / det
+        return self.within(x, y) & other.within(x, y) & ~parallel
+
+def _near(f1, f2):
+    # near() for arrays, with k = 1
+    diff = numpy.abs(f1 - f2)
+    return (diff < FL_EPS * numpy.abs(f1 + f2)) | (diff < FL_MIN)
+
+class BoundingCircle(object):
     # bounding circle helper
+    __slots__ = ('center', 'radius')
+
     def __init__(self, center, radius):
         self.center = center
         self.radius = radius
 
     def inside(self, point):
         # returns true if the point is inside the circle
-        return abs(point - self.center) < (self.radius * self.radius)
+        return point.dist2(self.center) < (self.radius * self.radius)
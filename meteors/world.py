@@ -2,18 +2,132 @@
 
 import math
 
-import pyglet
-from pyglet.gl import *
-from pyglet.window import key
+import numpy
 
 from vector import *
+from enums import *
+from store import *
+from fastmath import *
 
-class WObject():
+# pyglet's GL bindings take longer to import than the rest of the game put
+# together, and the Simulation never draws. WObject.draw() and friends load
+# them the first time they're called, see _gl()
+_gl_modules = None
+
+def _gl():
+    # (pyglet.gl, pyglet.graphics)
+    global _gl_modules
+    if _gl_modules == None:
+        import pyglet.gl
+        import pyglet.graphics
+        _gl_modules = (pyglet.gl, pyglet.graphics)
+    return _gl_modules
+
+class TransformStats():
+    # counts vertex transforms for the WObject transform cache. requested is
+    #  how many the callers asked for, computed is how many were actually done
+    def __init__(self):
+        self.requested = 0
+        self.computed = 0
+        self.last_requested = 0
+        self.last_computed = 0
+
+    def new_frame(self):
+        # call once per tick, the last frame's counts are kept in last_*
+        self.last_requested = self.requested
+        self.last_computed = self.computed
+        self.requested = 0
+        self.computed = 0
+
+    def saved(self):
+        # transforms the cache saved last frame
+        return self.last_requested - self.last_computed
+
+
+# Shapes shared by every object which uses them: name -> n x 2 array of
+# points in the unit square, as WObject.set_point_array() takes. They're read
+# only, an object that wants a different shape sets a new array.
+SHAPES = dict()
+# name -> flat list of x, y pairs or a function making an n x 2 array, for
+# shapes that are made the first time they're asked for
+SHAPE_SOURCES = dict()
+
+def shared_shape(name, points = None):
+    # the shape called name. points, a flat list of x, y pairs as
+    #  WObject.to_points() takes or an n x 2 array, registers the shape if
+    #  it isn't already
+    if name in SHAPES:
+        return SHAPES[name]
+    if points is None:
+        points = SHAPE_SOURCES[name]
+        if callable(points):
+            points = points()
+    point_array = numpy.array(points, numpy.float64).reshape(-1, 2)
+    point_array.flags.writeable = False
+    SHAPES[name] = point_array
+    return point_array
+
+def unit_circle(num_points):
+    # a circle of num_points lines about the middle of the unit square, as
+    #  WObject.generate_circle() makes it
+    rad = numpy.radians(numpy.arange(num_points + 1) * (360.0 / num_points))
+    ring = numpy.column_stack((0.5 - numpy.sin(rad) / 2, 0.5 + numpy.cos(rad) / 2))
+    # each point ends one line and starts the next
+    return numpy.concatenate((ring[:1], numpy.repeat(ring[1:], 2, 0), ring[:1]))
+
+def _point_list(point_array):
+    # an n x 2 array as a new list of Vector2
+    return [Vector2(x, y) for (x, y) in point_array.tolist()]
+
+SHAPE_SOURCES['box'] = [0, 0, 0, 1, 
+                        0, 1, 1, 1, 
+                        1, 1, 1, 0, 
+                        1, 0, 0, 0] # square
+SHAPE_SOURCES['circle'] = lambda: unit_circle(48)
+SHAPE_SOURCES['cross'] = [0, 0.5, 1, 0.5, 0.5, 0, 0.5, 1]
+
+
+class WObject(object):
     # Represents a game/world object. Handles it's own rendering, and updating.
     # Game objects should subclass this one. Contains some helper functions as well.
+    # pos, vel, deg, size, turn_speed and the pos/deg history are kept in a Store,
+    #  see store.py. Reading them gives you a copy, assign to change them.
+
+    # how the world moves this object. MOTION.custom means update() is called
+    # every tick, anything else is done for you by Store.step()
+    motion = MOTION.custom
+
+    # shared by all objects
+    transform_stats = TransformStats()
+    # bumped whenever any object changes its points or color, so a Renderer
+    # knows to lay out its vertex list again
+    shape_version = 0
+    # the pool.Pool this object was acquired from, if any
+    pool = None
+    # entity id while in a Simulation, see Simulation.add_item(). Never
+    #  reused, so unlike the object itself it can't come back from a pool
+    #  as something else
+    id = None
+
+    # debug stuff, set on an object to turn it on
+    draw_box = False # shows the unit box around the object
+    draw_circle = False # shows the unit circle around the object
+    draw_cross = False # shows a unit cross centered on object
+    draw_transform = False # draw the points transformed in cpu space
+    draw_pos_change = False # draws the positional change between two frames as a line
+
     def __init__(self):
         # how many past pos/deg to keep track of
         self.state_buffer = 5 
+        # until it's added to the world, the object has a store of its own.
+        #  It's kept for when the object leaves the world again
+        self.store = Store(1, self.state_buffer, False)
+        self.slot = self.store.alloc()
+        self._home = self.store
+        # transformed points and lines, see get_transformed()
+        self._transformed = dict()
+        self._lines = None
+        self._segments = None
         # position (x,y) (x > 0 => right, y > 0 => up)
         self.init_pos(Vector2(0, 0))
         # angular position in degrees. 0 = up, 90 = left
@@ -22,17 +136,16 @@ class WObject():
         self.vel = Vector2(0, 0)
         # size vector
         self.size = Vector2(1, 1)
+        # rotation speed in degrees per second, for objects that spin
+        self.turn_speed = 0
         # flag to mark object for removal
         self.remove = False
         
         # Define the shape. Place all vertexes within the unit square as defined below.
         #  Use size to then size it appropriately. Points should always be in groups of
         #  2 vectors. To connect lines, you must define the connecting
-        #  vertices twice.
-        self.points = self.to_points([0, 0, 0, 1, 
-                                      0, 1, 1, 1, 
-                                      1, 1, 1, 0, 
-                                      1, 0, 0, 0]) # square
+        #  vertices twice. Shapes which don't change are shared, see shared_shape()
+        self.set_point_array(shared_shape('box'))
 
         # where within the unit square should the position be defined.
         # it is also the point about which the object will rotate
@@ -41,101 +154,251 @@ class WObject():
         # color in RGB
         self.color = [1, 1, 1]
 
-        # debug stuff
-        self.box = self.points 
-        self.circle = self.generate_circle(48)
-        self.cross = self.to_points([0, 0.5, 1, 0.5, 0.5, 0, 0.5, 1])
-        self.draw_box = False # shows the unit box around the object
-        self.draw_circle = False # shows the unit circle around the object
-        self.draw_cross = False # shows a unit cross centered on object
-        self.draw_transform = False # draw the points transformed in cpu space
-        self.draw_pos_change = False # draws the positional change between two frames as a line
+
+    @property
+    def pos(self):
+        (x, y) = self.store.pos[self.slot].tolist()
+        return Vector2(x, y)
+
+    @pos.setter
+    def pos(self, pos):
+        self.store.pos[self.slot] = (pos.x, pos.y)
+        self.store.dirty[self.slot] = True
+
+    @property
+    def vel(self):
+        (x, y) = self.store.vel[self.slot].tolist()
+        return Vector2(x, y)
+
+    @vel.setter
+    def vel(self, vel):
+        self.store.vel[self.slot] = (vel.x, vel.y)
+
+    @property
+    def size(self):
+        (x, y) = self.store.size[self.slot].tolist()
+        return Vector2(x, y)
+
+    @size.setter
+    def size(self, size):
+        self.store.size[self.slot] = (size.x, size.y)
+        self.store.dirty[self.slot] = True
+
+    @property
+    def deg(self):
+        return float(self.store.deg[self.slot])
+
+    @deg.setter
+    def deg(self, deg):
+        self.store.deg[self.slot] = deg
+        self.store.dirty[self.slot] = True
+
+    @property
+    def points(self):
+        if self._points == None:
+            self._points = _point_list(self._point_array)
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        point_array = numpy.array([(p.x, p.y) for p in points], numpy.float64)
+        point_array.shape = (len(points), 2)
+        self.set_point_array(point_array)
+        self._points = points
+
+    # the debug shapes, as lists of Vector2 like points. Shared by every
+    #  object and only made if something asks for them
+
+    @property
+    def box(self):
+        return _point_list(shared_shape('box'))
+
+    @property
+    def circle(self):
+        return _point_list(shared_shape('circle'))
+
+    @property
+    def cross(self):
+        return _point_list(shared_shape('cross'))
+
+    def get_point_array(self):
+        # self.points as an n x 2 array, don't modify it
+        return self._point_array
+
+    # number of levels of detail get_lod_points() has
+    lods = 1
+
+    def get_lod_points(self, lod):
+        # the shape with less detail for higher lod, for drawing lots of
+        #  objects. 0 is get_point_array()
+        return self._point_array
+
+    def set_point_array(self, point_array):
+        # set the shape from an n x 2 array rather than a list of Vector2.
+        # the array is not copied, so don't modify it afterwards
+        self._point_array = point_array
+        self._points = None
+        self.store.dirty[self.slot] = True
+        WObject.shape_version += 1
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._color = color
+        WObject.shape_version += 1
+
+    @property
+    def turn_speed(self):
+        return float(self.store.turn_speed[self.slot])
+
+    @turn_speed.setter
+    def turn_speed(self, turn_speed):
+        self.store.turn_speed[self.slot] = turn_speed
+
+    @property
+    def last_pos(self):
+        # past positions, most recent first
+        return [Vector2(x, y) for (x, y) in self.store.pos_history(self.slot).tolist()]
+
+    @property
+    def last_deg(self):
+        # past angles, most recent first
+        return self.store.deg_history(self.slot).tolist()
+
+    def get_last_pos(self, age):
+        # the position age + 1 updates ago
+        (x, y) = self.store.last_pos_at(self.slot, age).tolist()
+        return Vector2(x, y)
+
+    def get_last_deg(self, age):
+        # the angle age + 1 updates ago
+        return float(self.store.last_deg_at(self.slot, age))
+
+    def detach(self):
+        # move out of the world store into a private one, keeping all state
+        self._home.adopt(self)
 
     def to_points(self, p_list):
         # converts flat list of floats to list of Vector2
         points = []
-        for i in range(len(p_list) / 2):
+        for i in range(len(p_list) // 2):
             x = p_list[i * 2]
             y = p_list[i * 2 + 1]
             points.append(Vector2(x, y))
         return points
 
+    def get_transformed(self, num = 0):
+        # returns all points after translation/rotation/scaling as an n x 2 array.
+        # if num > 0, will return the points generated from an older state.
+        # Results are cached until pos, deg or size next change, so the
+        #  narrow phase can ask for the same points over and over.
+        #  Don't modify the array you get back.
+        num = num % self.state_buffer
+        store = self.store
+        slot = self.slot
+        if store.dirty[slot]:
+            store.dirty[slot] = False
+            self._transformed = dict()
+            self._lines = None
+            self._segments = None
+        if num in self._transformed:
+            return self._transformed[num]
+        if num > 0:
+            deg = store.last_deg_at(slot, num - 1)
+            (x, y) = store.last_pos_at(slot, num - 1)
+        else:
+            deg = store.deg[slot]
+            (x, y) = store.pos[slot]
+        (sx, sy) = store.size[slot]
+        # center on anchor, scale, rotate, translate as one matrix
+        (sin, cos) = sin_cos(deg)
+        matrix = numpy.array([[cos * sx, sin * sx], 
+                              [-sin * sy, cos * sy]])
+        offset = numpy.array([x, y]) - numpy.dot((self.anchor.x, self.anchor.y), matrix)
+        points = numpy.dot(self._point_array, matrix) + offset
+        self._transformed[num] = points
+        self.transform_stats.computed += len(points)
+        return points
+
     def get_point_transformed(self, index, num = 0):
         # returns the point at index from by self.points but after
         #  translation/rotation/scaling via cpu. 
         # if num > 0, will return the points generated from an older state
-        num = num % self.state_buffer
-        point = self.points[index]
-        # center on anchor
-        point = point - self.anchor
-        # scale
-        point.x = point.x * self.size.x
-        point.y = point.y * self.size.y
-        # rotate
-        if num > 0:
-            deg = self.last_deg[num - 1]
-        else:
-            deg = self.deg
-        sin = math.sin(math.radians(deg))
-        cos = math.cos(math.radians(deg))
-        x = point.x * cos - point.y * sin
-        y = point.x * sin + point.y * cos
-        point.y = y
-        point.x = x
-        # translate
-        if num > 0:
-            pos = self.last_pos[num - 1]
-        else:
-            pos = self.pos
-        point = point + pos
-        return point
+        (x, y) = self.get_transformed(num)[index].tolist()
+        self.transform_stats.requested += 1
+        return Vector2(x, y)
 
     def get_all_points_transformed(self, num = 0):
-        # returns all transformed points. maybe slow for many points
-        points = []
-        for i in range(len(self.points)):
-            points.append(self.get_point_transformed(i, num))
-        return points
+        # returns all transformed points
+        points = self.get_transformed(num).tolist()
+        self.transform_stats.requested += len(points)
+        return [Vector2(x, y) for (x, y) in points]
+
+    def bounding_circle(self):
+        (x, y, radius) = self.get_bounds()
+        return BoundingCircle(Vector2(x, y), radius)
+
+    def get_bounds(self):
+        # (x, y, radius) of the bounding circle, without making any objects.
+        # the circle is about pos and contains the whole (scaled, rotated) unit square
+        (x, y) = self.store.pos[self.slot].tolist()
+        (sx, sy) = self.store.size[self.slot].tolist()
+        ax = self.anchor.x
+        ay = self.anchor.y
+        dx = max(ax, 1 - ax) * sx
+        dy = max(ay, 1 - ay) * sy
+        return (x, y, math.sqrt(dx * dx + dy * dy))
 
     def get_lines(self):
         # returns a list of all line segments defined by points after transformation.
-        lines = []
-        for i in range(len(self.points) / 2):
-            p1 = self.get_point_transformed(i * 2)
-            p2 = self.get_point_transformed(i * 2 + 1)
-            lines.append(Line(p1, p2))
-        return lines
+        # the list is shared until the object next moves, don't modify it
+        points = self.get_transformed()
+        self.transform_stats.requested += len(points)
+        if self._lines == None:
+            points = points.tolist()
+            lines = []
+            for i in range(len(points) // 2):
+                (x1, y1) = points[i * 2]
+                (x2, y2) = points[i * 2 + 1]
+                lines.append(Line(Vector2(x1, y1), Vector2(x2, y2)))
+            self._lines = lines
+        return self._lines
+
+    def get_segments(self):
+        # get_lines() as a SegmentBatch, shared until the object next moves
+        points = self.get_transformed()
+        self.transform_stats.requested += len(points)
+        if self._segments == None:
+            self._segments = SegmentBatch.from_points(points)
+        return self._segments
 
     def init_pos(self, pos):
         # initialize position vector
         self.pos = pos
-        self.last_pos = []
-        for i in range(self.state_buffer):
-            self.last_pos.append(pos)
+        self.store.last_pos[self.slot] = (pos.x, pos.y)
 
     def update_pos(self, pos):
         # update the position vector
-        self.last_pos.insert(0, self.pos)
-        self.last_pos.pop()
+        self.store.push_pos(self.slot)
         self.pos = pos
 
     def init_deg(self, deg):
         # initialize degrees member
         self.deg = deg
-        self.last_deg = []
-        for i in range(self.state_buffer):
-            self.last_deg.append(deg)
+        self.store.last_deg[self.slot] = deg
 
     def update_deg(self, deg):
         # update the degrees member
-        self.last_deg.insert(0, self.deg)
-        self.last_deg.pop()
+        self.store.push_deg(self.slot)
         self.deg = deg
 
     def get_pos_change(self, num):
         # the positional change from num update cycles ago (where num < self.state_buffer)
         num = num % self.state_buffer
-        return self.pos - self.last_pos[num]
+        return self.pos - self.get_last_pos(num)
 
     def generate_circle(self, num_points):
         # generates a unit circle with num_points
@@ -155,49 +418,79 @@ class WObject():
 
     def deg_to_vel(self, deg):
         # convert degrees (up => 0, left => 90) 
-        #  to a normalized vector (top|right => y|x > 0)
-        y = abs(math.tan(math.radians(deg-90)))
-        x = 1
-        if deg > 0 and deg < 180:
-            x = -1
-        if deg > 90 and deg < 270:
-            y = -y
-        return Vector2(x, y).normalize()
+        #  to a normalized vector (top|right => y|x > 0), see fastmath.heading()
+        return heading(deg)
 
     def draw_points(self, points):
         # draws the set of point pairs as GL_LINES
+        (gl, graphics) = _gl()
         the_points = []
         for point in points:
             the_points.append(point.x)
             the_points.append(point.y)
-        pyglet.graphics.draw(len(points), GL_LINES, ('v2f', the_points))
+        graphics.draw(len(points), gl.GL_LINES, ('v2f', the_points))
+
+    def draw_point_array(self, point_array):
+        # draw_points() for an n x 2 array
+        (gl, graphics) = _gl()
+        graphics.draw(len(point_array), gl.GL_LINES, 
+                      ('v2f', point_array.ravel().tolist()))
 
     def draw(self):
         # simple scale/rotate/tranlate and color of gl lines
-        glLoadIdentity()
+        # Game draws with a Renderer instead, this is handy for one-offs
+        (gl, graphics) = _gl()
+        self.draw_debug()
+        self._transform()
+        gl.glColor3f(self.color[0], self.color[1], self.color[2])
+        self.draw_point_array(self._point_array)
+
+    def has_debug(self):
+        # true if any of the debug drawing flags are set
+        return (self.draw_box or self.draw_circle or self.draw_cross or 
+                self.draw_transform or self.draw_pos_change)
+
+    def draw_debug(self):
+        # draws whatever debug stuff is turned on
+        (gl, graphics) = _gl()
+        gl.glLoadIdentity()
         if self.draw_pos_change:
-            glColor3f(1, 1, 0)
-            points = [self.last_pos.x, self.last_pos.y, self.pos.x, self.pos.y]
+            gl.glColor3f(1, 1, 0)
+            points = [self.get_last_pos(0), self.pos]
             self.draw_points(points)
         if self.draw_transform:
             points = self.get_all_points_transformed()
-            glColor3f(0, 0, 1)
+            gl.glColor3f(0, 0, 1)
             self.draw_points(points)
-        glColor3f(self.color[0], self.color[1], self.color[2])
-        glTranslatef(self.pos.x, self.pos.y, 0)
-        glRotatef(self.deg, 0, 0, 1)
-        glScalef(self.size.x, self.size.y, 1)
-        glTranslatef(-self.anchor.x, -self.anchor.y, 0)
-        self.draw_points(self.points)
-        if self.draw_box:
-            self.draw_points(self.box)
-        if self.draw_circle:
-            self.draw_points(self.circle)
-        if self.draw_cross:
-            self.draw_points(self.cross)
+        if self.draw_box or self.draw_circle or self.draw_cross:
+            self._transform()
+            gl.glColor3f(self.color[0], self.color[1], self.color[2])
+            if self.draw_box:
+                self.draw_point_array(shared_shape('box'))
+            if self.draw_circle:
+                self.draw_point_array(shared_shape('circle'))
+            if self.draw_cross:
+                self.draw_point_array(shared_shape('cross'))
+
+    def _transform(self):
+        # set the gl modelview to scale/rotate/translate the unit square
+        (gl, graphics) = _gl()
+        pos = self.pos
+        size = self.size
+        gl.glLoadIdentity()
+        gl.glTranslatef(pos.x, pos.y, 0)
+        gl.glRotatef(self.deg, 0, 0, 1)
+        gl.glScalef(size.x, size.y, 1)
+        gl.glTranslatef(-self.anchor.x, -self.anchor.y, 0)
 
 class Font(WObject):
     # drawable text object
+
+    # laid out strings, (string, spacing, just-x, just-y) -> point array,
+    # shared by every Font
+    layout_cache = dict()
+    layout_cache_size = 256
+
     def __init__(self, pos, size, opts = {}):
         WObject.__init__(self)
         self.anchor = Vector2(0, 0)
@@ -211,110 +504,131 @@ class Font(WObject):
         self.opts.update(opts)
         self.string = ""
         self.did_update_string = True
-        self._init_char_points()
+        self.char_points = CHAR_POINTS
+        # the glyphs of the current layout, [char, extra, points] per character,
+        # so changing a few characters only lays out those again
+        self._glyphs = []
 
     def set_string(self, string):
         # set the string to display
         self.string = string
         self.did_update_string = True
 
-    def update(self, time, window):
+    def update(self, time, world_size):
         if self.did_update_string:
             self.did_update_string = False
-            self.points = self._string_to_points(self.string)
+            self.set_point_array(self._string_to_points(self.string))
 
     def _string_to_points(self, string):
-        points = []
-        index = 0
-        for char in string:
-            points = points + self._char_to_points(char, index)
-            index += 1
-        return points
+        # the points for string as an n x 2 array
+        key = (string, self.opts['spacing'], self.opts['just-x'], self.opts['just-y'])
+        cache = Font.layout_cache
+        if key in cache:
+            return cache[key]
 
-    def _char_to_points(self, char, index):
-        if char in self.char_points:
-            points = self.to_points(self.char_points[char])
+        # one pass, and glyphs that haven't moved or changed are reused
+        width = self._find_width(len(string))
+        old = self._glyphs
+        glyphs = []
+        for index in range(len(string)):
+            char = string[index]
+            extra = self._find_extra(index, width)
+            if (index < len(old) and old[index][0] == char and 
+                    old[index][1] == extra):
+                glyphs.append(old[index])
+            else:
+                points = GLYPHS.get(char, GLYPHS[' ']) + extra
+                glyphs.append([char, extra, points])
+        self._glyphs = glyphs
+        if len(glyphs) > 0:
+            points = numpy.concatenate([glyph[2] for glyph in glyphs])
         else:
-            points = []
-        extra = self._find_extra(index)
-        for point in points:
-            point.update(point + extra)
+            points = GLYPHS[' ']
+
+        if len(cache) >= Font.layout_cache_size:
+            cache.clear()
+        cache[key] = points
         return points
 
-    def _find_extra(self, index):
-        extra = Vector2(0, 0)
-        extra.x = (1 + self.opts['spacing']) * index
+    def _find_extra(self, index, width):
+        # offset of the character at index, as an (x, y) tuple
+        x = (1 + self.opts['spacing']) * index
+        y = 0
         if self.opts['just-x'] == 'center':
-            extra.x = extra.x - self._find_width() / 2
+            x = x - width / 2
         if self.opts['just-x'] == 'right':
-            extra.x = extra.x - self._find_width()
+            x = x - width
         if self.opts['just-y'] == 'center':
-            extra.y = extra.y - self._find_height() / 2
+            y = y - self._find_height() / 2
         if self.opts['just-y'] == 'top':
-            extra.y = extra.y - self._find_height()
-        return extra
+            y = y - self._find_height()
+        return (x, y)
 
-    def _find_width(self):
-        length = len(self.string)
+    def _find_width(self, length):
         return length + self.opts['spacing'] * (length - 1)
 
     def _find_height(self):
         return 1
 
-    def _init_char_points(self):
-        # oh god why
-        self.char_points = {
-            'A': [0, 0, 0.5, 1, 0.5, 1, 1, 0, 0.25, 0.5, 0.75, 0.5],
-            'B': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
-                    0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0, 0, 0, 0.5, 0.75, 0.5],
-            'C': [1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 0, 0.25, 0, 
-                    0.75, 0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75],
-            'D': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 1, 0.25, 
-                    1, 0.25, 0.75, 0, 0.75, 0, 0, 0],
-            'E': [0, 1, 1, 1, 0, 0.5, 0.75, 0.5, 0, 0, 1, 0, 0, 0, 0, 1],
-            'F': [0, 0, 0, 1, 0, 1, 1, 1, 0, 0.5, 0.75, 0.5],
-            'G': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
-                    0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.5, 1, 0.5, 0.5, 0.5],
-            'H': [0, 0, 0, 1, 1, 0, 1, 1, 0, 0.5, 1, 0.5],
-            'I': [0.25, 1, 0.75, 1, 0.25, 0, 0.75, 0, 0.5, 0, 0.5, 1],
-            'J': [0, 0, 0.5, 0, 0.5, 0, 0.5, 1, 0, 1, 1, 1],
-            'K': [0, 0, 0, 1, 0, 0.5, 1, 1, 0, 0.5, 1, 0],
-            'L': [0, 0, 0, 1, 0, 0, 1, 0],
-            'M': [0, 0, 0, 1, 0, 1, 0.5, 0.5, 0.5, 0.5, 1, 1, 1, 1, 1, 0],
-            'N': [0, 0, 0, 1, 0, 1, 1, 0, 1, 0, 1, 1],
-            'O': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
-                    0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75],
-            'P': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 0.5, 0, 0.5],
-            'Q': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
-                    0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 0.75, 0.25, 1, 0],
-            'R': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 
-                    0.75, 0.5, 0, 0.5, 0.75, 0.5, 1, 0],
-            'S': [0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 0.75, 0.5, 0.75, 0.5, 
-                    0.25, 0.5, 0.25, 0.5, 0, 0.75, 0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75],
-            'T': [0, 1, 1, 1, 0.5, 1, 0.5, 0],
-            'U': [0, 1, 0, 0.25, 0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 1],
-            'V': [0, 1, 0.5, 0, 0.5, 0, 1, 1],
-            'W': [0, 1, 0, 0, 0, 0, 0.5, 0.5, 0.5, 0.5, 1, 0, 1, 0, 1, 1],
-            'X': [0, 0, 1, 1, 1, 0, 0, 1],
-            'Y': [0, 1, 0.5, 0.5, 0.5, 0.5, 1, 1, 0.5, 0.5, 0.5, 0],
-            'Z': [0, 1, 1, 1, 1, 1, 0, 0, 0, 0, 1, 0],
-            '1': [0, 0.75, 0.5, 1, 0.5, 1, 0.5, 0, 0, 0, 1, 0],
-            '2': [1, 0, 0, 0, 0, 0, 0.75, 0.5, 0.75, 0.5, 1, 0.75, 1, 0.75, 0.75, 
-                    1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75],
-            '3': [0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
-                    0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 0.25, 0.5, 0.75, 0.5],
-            '4': [0.75, 0, 0.75, 1, 0.75, 1, 0, 0.25, 0, 0.25, 1, 0.25],
-            '5': [1, 1, 0, 1, 0, 1, 0, 0.5, 0, 0.5, 0.75, 0.5, 0.75, 0.5, 1, 0.25, 
-                    1, 0.25, 0.75, 0, 0.75, 0, 0, 0],
-            '6': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0.25, 
-                    0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 0.75, 0.5, 0.75, 0.5, 0, 0.5],
-            '7': [0, 1, 1, 1, 1, 1, 0.25, 0],
-            '8': [0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
-                    0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 
-                    0, 0.25, 0.25, 0.5, 0.25, 0.5, 0, 0.75, 0.25, 0.5, 0.75, 0.5],
-            '9': [0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 
-                    0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0.25, 0.5, 0.25, 0.5, 1, 0.5],
-            '0': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
-                    0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 0.75, 1, 0.25, 0],
-        }
+# glyphs for Font, each a flat list of x, y pairs within the unit square
+# oh god why
+CHAR_POINTS = {
+    'A': [0, 0, 0.5, 1, 0.5, 1, 1, 0, 0.25, 0.5, 0.75, 0.5],
+    'B': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
+            0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0, 0, 0, 0.5, 0.75, 0.5],
+    'C': [1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 0, 0.25, 0, 
+            0.75, 0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75],
+    'D': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 1, 0.25, 
+            1, 0.25, 0.75, 0, 0.75, 0, 0, 0],
+    'E': [0, 1, 1, 1, 0, 0.5, 0.75, 0.5, 0, 0, 1, 0, 0, 0, 0, 1],
+    'F': [0, 0, 0, 1, 0, 1, 1, 1, 0, 0.5, 0.75, 0.5],
+    'G': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
+            0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.5, 1, 0.5, 0.5, 0.5],
+    'H': [0, 0, 0, 1, 1, 0, 1, 1, 0, 0.5, 1, 0.5],
+    'I': [0.25, 1, 0.75, 1, 0.25, 0, 0.75, 0, 0.5, 0, 0.5, 1],
+    'J': [0, 0, 0.5, 0, 0.5, 0, 0.5, 1, 0, 1, 1, 1],
+    'K': [0, 0, 0, 1, 0, 0.5, 1, 1, 0, 0.5, 1, 0],
+    'L': [0, 0, 0, 1, 0, 0, 1, 0],
+    'M': [0, 0, 0, 1, 0, 1, 0.5, 0.5, 0.5, 0.5, 1, 1, 1, 1, 1, 0],
+    'N': [0, 0, 0, 1, 0, 1, 1, 0, 1, 0, 1, 1],
+    'O': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
+            0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75],
+    'P': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 0.5, 0, 0.5],
+    'Q': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
+            0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 0.75, 0.25, 1, 0],
+    'R': [0, 0, 0, 1, 0, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 
+            0.75, 0.5, 0, 0.5, 0.75, 0.5, 1, 0],
+    'S': [0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 0.75, 0.5, 0.75, 0.5, 
+            0.25, 0.5, 0.25, 0.5, 0, 0.75, 0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75],
+    'T': [0, 1, 1, 1, 0.5, 1, 0.5, 0],
+    'U': [0, 1, 0, 0.25, 0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 1],
+    'V': [0, 1, 0.5, 0, 0.5, 0, 1, 1],
+    'W': [0, 1, 0, 0, 0, 0, 0.5, 0.5, 0.5, 0.5, 1, 0, 1, 0, 1, 1],
+    'X': [0, 0, 1, 1, 1, 0, 0, 1],
+    'Y': [0, 1, 0.5, 0.5, 0.5, 0.5, 1, 1, 0.5, 0.5, 0.5, 0],
+    'Z': [0, 1, 1, 1, 1, 1, 0, 0, 0, 0, 1, 0],
+    '1': [0, 0.75, 0.5, 1, 0.5, 1, 0.5, 0, 0, 0, 1, 0],
+    '2': [1, 0, 0, 0, 0, 0, 0.75, 0.5, 0.75, 0.5, 1, 0.75, 1, 0.75, 0.75, 
+            1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75],
+    '3': [0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
+            0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 0.25, 0.5, 0.75, 0.5],
+    '4': [0.75, 0, 0.75, 1, 0.75, 1, 0, 0.25, 0, 0.25, 1, 0.25],
+    '5': [1, 1, 0, 1, 0, 1, 0, 0.5, 0, 0.5, 0.75, 0.5, 0.75, 0.5, 1, 0.25, 
+            1, 0.25, 0.75, 0, 0.75, 0, 0, 0],
+    '6': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0.25, 
+            0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 0.75, 0.5, 0.75, 0.5, 0, 0.5],
+    '7': [0, 1, 1, 1, 1, 1, 0.25, 0],
+    '8': [0, 0.75, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 1, 1, 0.75, 1, 0.75, 0.75, 0.5, 0.75, 
+            0.5, 1, 0.25, 1, 0.25, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 0, 0, 0.25, 
+            0, 0.25, 0.25, 0.5, 0.25, 0.5, 0, 0.75, 0.25, 0.5, 0.75, 0.5],
+    '9': [0, 0.25, 0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 1, 0.75, 
+            0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0.25, 0.5, 0.25, 0.5, 1, 0.5],
+    '0': [1, 0.75, 0.75, 1, 0.75, 1, 0.25, 1, 0.25, 1, 0, 0.75, 0, 0.75, 0, 0.25, 0, 0.25, 
+            0.25, 0, 0.25, 0, 0.75, 0, 0.75, 0, 1, 0.25, 1, 0.25, 1, 0.75, 0.75, 1, 0.25, 0],
+}
 
+# the same, as n x 2 arrays, shared by every Font
+GLYPHS = dict([(char, numpy.array(points, numpy.float64).reshape(-1, 2))
+               for (char, points) in CHAR_POINTS.items()])
+# anything we don't have a glyph for is blank
+GLYPHS[' '] = numpy.zeros((0, 2))
@@ -9,6 +9,6 @@ setup(name='Meteors',
     version='1.1dev',
     packages=['meteors'],
     description='Small game', 
-    requires=['pyglet'],
+    requires=['pyglet', 'numpy'],
     long_description=open('README.md').read(),
 )